@@ -23,9 +23,19 @@ Parámetros del algoritmo:
 
 import random
 import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import protocolo
+from bits import popcount
+from instrumentacion import NULA
 
 TARGET = "1101110101"
 GENES = "01"
+MAX_GENERATIONS = 10000
 
 # Función de aptitud (fitness): Evalúa qué tan cerca está un individuo de la solución
 def fitness(individual):
@@ -36,80 +46,356 @@ def fitness(individual):
     return sum(1 for i, j in zip(individual, TARGET) if i == j)
 
 # Crear un individuo aleatorio
-def create_individual():
+def create_individual(rng=random):
     """
     Genera un individuo aleatorio como una cadena de 0s y 1s.
     """
-    return ''.join(random.choice(GENES) for _ in range(len(TARGET)))
+    return ''.join(rng.choice(GENES) for _ in range(len(TARGET)))
 
 # Crear la población inicial
-def create_population(size):
+def create_population(size, rng=random):
     """
     Crea una población inicial de individuos aleatorios.
     """
-    return [create_individual() for _ in range(size)]
+    return [create_individual(rng) for _ in range(size)]
+
+# Caché de aptitudes: evita reevaluar individuos ya vistos
+class FitnessCache:
+    """
+    Guarda genotipo -> aptitud con política LRU. `maxsize` limita el número de
+    entradas y `max_bytes` (opcional) el tamaño aproximado de las claves.
+    Lleva la cuenta de aciertos (hits) y fallos (misses).
+    """
+    def __init__(self, maxsize=10000, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, individual, fitness_fn):
+        if individual in self._data:
+            self._data.move_to_end(individual)
+            self.hits += 1
+            return self._data[individual]
+        self.misses += 1
+        value = fitness_fn(individual)
+        self._store(individual, value)
+        return value
+
+    def _store(self, individual, value):
+        self._data[individual] = value
+        self._bytes += sys.getsizeof(individual)
+        while self._data and (
+            len(self._data) > self.maxsize
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            old, _ = self._data.popitem(last=False)
+            self._bytes -= sys.getsizeof(old)
+
+    def evaluate(self, population, fitness_fn, map_fn=map):
+        """
+        Evalúa cada individuo distinto de la población una sola vez.
+        Los que no están en caché se evalúan juntos con `map_fn`, que debe
+        devolver los resultados en orden (map, Executor.map...).
+        Devuelve un diccionario individuo -> aptitud.
+        """
+        scores = {}
+        missing = []
+        for ind in dict.fromkeys(population):
+            if ind in self._data:
+                self._data.move_to_end(ind)
+                self.hits += 1
+                scores[ind] = self._data[ind]
+            else:
+                missing.append(ind)
+        self.misses += len(missing)
+        for ind, value in zip(missing, map_fn(fitness_fn, missing)):
+            scores[ind] = value
+            self._store(ind, value)
+        return scores
+
+# Ejecutores para evaluar la aptitud en paralelo
+def make_executor(backend, workers=None):
+    """
+    Crea el ejecutor del backend de evaluación: "serial" (ninguno), "thread" o "process".
+    """
+    if backend == "serial":
+        return None
+    if backend == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if backend == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"Backend de evaluación desconocido: {backend}")
 
 # Selección por torneo: Elige el mejor entre dos individuos aleatorios
-def selection(population):
+def selection(population, key=fitness, rng=random):
     """
     Selecciona dos individuos aleatorios y devuelve el que tiene mayor aptitud.
     """
-    return max(random.choices(population, k=2), key=fitness)
+    return max(rng.choices(population, k=2), key=key)
 
 # Cruce (crossover): Combina dos individuos para crear un hijo
-def crossover(parent1, parent2):
+def crossover(parent1, parent2, rng=random):
     """
     Realiza el cruce entre dos padres para crear un hijo.
     El punto de cruce se elige aleatoriamente.
     """
-    split = random.randint(0, len(parent1) - 1)
+    split = rng.randint(0, len(parent1) - 1)
     return parent1[:split] + parent2[split:]
 
 # Mutación: Cambia aleatoriamente algunos genes
-def mutate(individual,mutation_rate):
+def mutate(individual,mutation_rate, rng=random):
     """
     Aplica mutación a un individuo. Cada gen tiene una probabilidad MUTATION_RATE de mutar.
     """
     return ''.join(
-        gene if random.random() > mutation_rate else random.choice(GENES)
+        gene if rng.random() > mutation_rate else rng.choice(GENES)
         for gene in individual
     )
 
 # Algoritmo genético principal
-def genetic_algorithm(population_size, mutation_rate):
-    population = create_population(population_size)
+def genetic_algorithm(
+    population_size,
+    mutation_rate,
+    fitness_fn=fitness,
+    target_fitness=None,
+    cache=None,
+    backend="serial",
+    workers=None,
+    chunksize=1,
+    max_generations=None,
+    time_limit=None,
+    stagnation_limit=None,
+    seed=None,
+    instrumentacion=None,
+):
+    """
+    `fitness_fn` puede ser cualquier función individuo -> aptitud. Con la
+    aptitud por defecto el algoritmo termina al encontrar TARGET; con otra,
+    TARGET no significa nada y solo cuentan `target_fitness` y los demás
+    criterios de parada (hay que indicar al menos uno).
+    Las aptitudes se guardan en `cache` (un FitnessCache) entre generaciones.
+
+    `backend` elige cómo se evalúan los individuos nuevos de cada generación:
+    "serial", "thread" o "process" (con `fitness_fn` importable y lotes de
+    `chunksize` individuos por envío). También se detiene tras `max_generations`,
+    `time_limit` segundos o `stagnation_limit` generaciones sin mejorar.
+    Con `seed` la ejecución es reproducible y `instrumentacion` mide sus fases.
+    """
+    for state in genetic_algorithm_steps(
+        population_size, mutation_rate, fitness_fn, target_fitness, cache, backend,
+        workers, chunksize, max_generations, time_limit, stagnation_limit, seed,
+        instrumentacion,
+    ):
+        pass
+    # Solo devolvemos estos dos datos
+    return state["generacion"], state["mejor_individuo"]
+
+def genetic_algorithm_steps(
+    population_size,
+    mutation_rate,
+    fitness_fn=fitness,
+    target_fitness=None,
+    cache=None,
+    backend="serial",
+    workers=None,
+    chunksize=1,
+    max_generations=None,
+    time_limit=None,
+    stagnation_limit=None,
+    seed=None,
+    instrumentacion=None,
+):
+    """
+    Igual que genetic_algorithm, pero produce el estado de cada generación
+    (mejor aptitud, mejor individuo, diversidad). El último estado tiene
+    "terminado" a True; si se abandona antes, el ejecutor se cierra igualmente.
+    """
+    busca_target = fitness_fn is fitness
+    if not busca_target and target_fitness is None and max_generations is None \
+            and time_limit is None and stagnation_limit is None:
+        raise ValueError("Con una fitness_fn propia indica al menos un criterio de parada")
+    if cache is None:
+        cache = FitnessCache()
+    executor = make_executor(backend, workers)
+    if executor is None:
+        map_fn = map
+    else:
+        def map_fn(fn, individuals):
+            return executor.map(fn, individuals, chunksize=chunksize)
+
+    inst = instrumentacion or NULA
+    rng = random.Random(seed)
+    start = time.monotonic()
+    population = create_population(population_size, rng)
+    generation = 1
+    best_score = None
+    stagnant = 0
+
+    try:
+        while True:
+            hits, misses = cache.hits, cache.misses
+            with inst.fase("evaluacion"):
+                scores = cache.evaluate(population, fitness_fn, map_fn)
+            inst.contar("evaluaciones", cache.misses - misses)
+            inst.contar("aciertos_cache", cache.hits - hits)
+            best_individual = max(population, key=scores.get)
+
+            if best_score is None or scores[best_individual] > best_score:
+                best_score = scores[best_individual]
+                stagnant = 0
+            else:
+                stagnant += 1
+
+            finished = (
+                (busca_target and best_individual == TARGET)
+                or (target_fitness is not None and scores[best_individual] >= target_fitness)
+                or (max_generations is not None and generation >= max_generations)
+                or (time_limit is not None and time.monotonic() - start >= time_limit)
+                or (stagnation_limit is not None and stagnant >= stagnation_limit)
+            )
+            estado = {
+                "generacion": generation,
+                "mejor": scores[best_individual],
+                "mejor_individuo": best_individual,
+                # Fracción de individuos distintos en la población
+                "diversidad": len(scores) / len(population),
+                "poblacion": len(population),
+                "terminado": finished,
+            }
+            inst.notificar(estado)
+            yield estado
+            if finished:
+                return
+
+            with inst.fase("reproduccion"):
+                population = _next_generation(population, scores, population_size, mutation_rate, rng)
+            generation += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def _next_generation(population, scores, population_size, mutation_rate, rng=random):
+    new_population = []
+    for _ in range(population_size):
+        parent1 = selection(population, key=scores.get, rng=rng)
+        parent2 = selection(population, key=scores.get, rng=rng)
+        child = crossover(parent1, parent2, rng)
+        child = mutate(child, mutation_rate, rng)
+        new_population.append(child)
+    return new_population
+
+# Versión empaquetada: toda la población como matriz de bits en NumPy
+def pack_individuals(individuals):
+    """
+    Convierte cadenas de 0s y 1s en una matriz uint8 con 8 genes por byte.
+    """
+    bits = np.array([[c == '1' for c in ind] for ind in individuals], dtype=np.uint8)
+    return np.packbits(bits, axis=1)
+
+def unpack_individual(packed, length):
+    """
+    Convierte una fila empaquetada de vuelta a cadena de 0s y 1s.
+    """
+    return ''.join(map(str, np.unpackbits(packed)[:length]))
+
+def packed_fitness(population, target, length):
+    """
+    Aptitud de toda la población: genes que coinciden con el objetivo (XOR + popcount).
+    Los bits de relleno del último byte son cero en ambos, así que no restan.
+    """
+    return length - popcount(population ^ target).sum(axis=1, dtype=np.int64)
+
+def genetic_algorithm_packed(population_size, mutation_rate, target=TARGET, max_generations=None, seed=None,
+                             instrumentacion=None):
+    """
+    Igual que genetic_algorithm pero con la población empaquetada en bits:
+    selección por torneo, cruce en un punto y mutación se aplican a toda la
+    generación con unas pocas operaciones de arrays. Solo admite GENES = "01".
+    Devuelve (generaciones, mejor individuo) o se detiene en max_generations.
+    """
+    inst = instrumentacion or NULA
+    rng = np.random.default_rng(seed)
+    length = len(target)
+    target_packed = pack_individuals([target])[0]
+    n_bytes = len(target_packed)
+    # Máscara de los bits válidos: el relleno del último byte debe quedar a cero
+    valid = np.packbits(np.ones(length, dtype=np.uint8))
+
+    population = np.packbits(rng.integers(0, 2, (population_size, length), dtype=np.uint8), axis=1)
+    bit_offsets = 8 * np.arange(n_bytes)
     generation = 1
 
     while True:
-        best_individual = max(population, key=fitness)
-        
-        if best_individual == TARGET:
-            # Solo devolvemos estos dos datos
-            return generation, best_individual
-
-        new_population = []
-        for _ in range(population_size):
-            parent1 = selection(population)
-            parent2 = selection(population)
-            child = crossover(parent1, parent2)
-            child = mutate(child, mutation_rate)
-            new_population.append(child)
-
-        population = new_population
+        with inst.fase("evaluacion"):
+            scores = packed_fitness(population, target_packed, length)
+        inst.contar("evaluaciones", population_size)
+        best = int(np.argmax(scores))
+        inst.notificar({"generacion": generation, "mejor": int(scores[best])})
+        if scores[best] == length or (max_generations is not None and generation >= max_generations):
+            return generation, unpack_individual(population[best], length)
+
+        with inst.fase("seleccion"):
+            # Selección por torneo de dos para cada padre
+            contenders = rng.integers(0, population_size, (2, population_size, 2))
+            a, b = contenders[..., 0], contenders[..., 1]
+            parents = np.where(scores[a] >= scores[b], a, b)
+            parent1, parent2 = population[parents[0]], population[parents[1]]
+
+        with inst.fase("cruce"):
+            # Cruce en un punto: bits antes de `split` del primer padre, el resto del segundo
+            split = rng.integers(0, length, population_size)
+            taken = np.clip(split[:, None] - bit_offsets, 0, 8).astype(np.uint16)
+            mask = ((0xFF << (8 - taken)) & 0xFF).astype(np.uint8)
+            children = (parent1 & mask) | (parent2 & ~mask)
+
+        with inst.fase("mutacion"):
+            # Mutación: como en mutate, el gen nuevo es aleatorio, así que cambia con prob. rate/2
+            n_genes = population_size * length
+            n_flips = rng.binomial(n_genes, mutation_rate / 2)
+            if n_flips:
+                genes = rng.integers(0, n_genes, n_flips)
+                rows, cols = np.divmod(genes, length)
+                np.bitwise_xor.at(children, (rows, cols // 8), (0x80 >> (cols % 8)).astype(np.uint8))
+            children &= valid
+
+        population = children
         generation += 1
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Uso: python algoritmo genético.py <poblacion> <mutacion>")
-        sys.exit(1)
+def ejecutar(poblacion, mutacion, seed=None):
+    """Punto de entrada para el menú: devuelve las salidas como (tipo, clave, valor)"""
+    return protocolo.consumir(ejecutar_por_pasos(poblacion, mutacion, seed))
 
+def ejecutar_por_pasos(poblacion, mutacion, seed=None):
+    """Como ejecutar, pero produce el estado de cada generación y devuelve las salidas al terminar"""
     try:
-        poblacion = int(sys.argv[1])
-        mutacion = float(sys.argv[2])
+        poblacion = int(poblacion)
+        mutacion = float(mutacion)
     except ValueError:
-        print("Error: Poblacion debe ser un entero y mutacion un decimal (0-1)")
+        raise ValueError("Poblacion debe ser un entero y mutacion un decimal (0-1)")
+
+    for estado in genetic_algorithm_steps(poblacion, mutacion, max_generations=MAX_GENERATIONS, seed=seed):
+        yield estado
+    generaciones, mejor_individuo = estado["generacion"], estado["mejor_individuo"]
+    return [
+        ("success", "Generaciones", generaciones),
+        ("success", "Mejor individuo", mejor_individuo),
+    ]
+
+if __name__ == "__main__":
+    binario = "--binario" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--binario"]
+    if len(args) != 2:
+        print("error|Uso: python algoritmo_genetico.py <poblacion> <mutacion> [--binario]")
         sys.exit(1)
 
-    generaciones, mejor_individuo = genetic_algorithm(poblacion, mutacion)
-    print(f"Generaciones: {generaciones}")
-    print(f"Mejor individuo: {mejor_individuo}")
\ No newline at end of file
+    try:
+        protocolo.imprimir(ejecutar(*args), binario)
+    except Exception as e:
+        protocolo.imprimir([("error", "Error", str(e))], binario)
+        sys.exit(1)
@@ -1,9 +1,31 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import List, Tuple
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
 import io
 import base64
+import math
+import multiprocessing as mp
+import os
 import sys
+from multiprocessing import shared_memory
+
+import protocolo
+from instrumentacion import NULA
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy es opcional: sin él se usa búsqueda por bloques
+    cKDTree = None
+
+def _heuristic(distances: np.ndarray, beta: float) -> np.ndarray:
+    """η^β = (1/d)^β. Ciudades duplicadas (d = 0): atractivo alto pero finito, con
+    margen para que τ^α·η^β no desborde cuando la feromona crece"""
+    with np.errstate(divide="ignore", over="ignore"):
+        heuristic = (1 / distances) ** beta
+    finite = np.isfinite(heuristic)
+    if not finite.all():
+        heuristic[~finite] = (heuristic[finite].max(initial=0.0) or 1.0) * 1e3
+    return heuristic
 
 class AntColonySystem:
     def __init__(
@@ -15,39 +37,100 @@ class AntColonySystem:
         alpha: float = 1.0,
         beta: float = 2.0,
         q0: float = 0.9,
+        vectorized: bool = False,
+        batched: bool = False,
+        local_search: Optional[str] = None,
+        seed=None,
+        instrumentacion=None,
     ):
         self.distances = distances
+        self.rng = np.random.default_rng(seed)
+        self.instrumentacion = instrumentacion or NULA
         self.n_ants = n_ants
         self.iterations = iterations
         self.decay = decay
         self.alpha = alpha
         self.beta = beta
         self.q0 = q0
-        self.n_cities = len(distances)
-        self.pheromone = np.ones((self.n_cities, self.n_cities)) / self.n_cities
+        self.vectorized = vectorized
+        self.batched = batched
+        self.local_search = local_search
+        self.neighbors = None
+        self.iteration = 0
         self.best_path = None
         self.best_distance = np.inf
+        self._init_edges()
+        if self.vectorized or self.batched:
+            self._update_attractiveness()
+
+    def _init_edges(self) -> None:
+        """Feromona y heurística de todas las aristas (matrices n×n)"""
+        distances = np.array(self.distances, dtype=float)
+        self.n_cities = len(distances)
+        self.pheromone_init = 1 / self.n_cities
+        self.pheromone = np.full((self.n_cities, self.n_cities), self.pheromone_init)
+        # η^β no cambia entre iteraciones: se calcula una sola vez (diagonal a 0)
+        np.fill_diagonal(distances, np.inf)
+        self.heuristic = _heuristic(distances, self.beta)
 
     def run(self) -> Tuple[List[int], float]:
+        for _ in self.steps():
+            pass
+        return self.best_path, self.best_distance
+
+    def steps(self) -> Iterator[dict]:
+        """
+        Ejecuta `iterations` iteraciones produciendo el estado tras cada una.
+        Se puede abandonar en cualquier momento y volver a llamar para continuar.
+        """
+        inst = self.instrumentacion
         for _ in range(self.iterations):
             paths = self._generate_paths()
-            self._update_pheromone(paths)
+            inst.contar("caminos", len(paths))
+            if self.local_search:
+                with inst.fase("busqueda_local"):
+                    paths = self._improve_paths(paths)
+            with inst.fase("feromona"):
+                self._update_pheromone(paths)
+                if self.vectorized or self.batched:
+                    self._update_attractiveness()
             current_best_path, current_best_dist = min(paths, key=lambda x: x[1])
             if current_best_dist < self.best_distance:
                 self.best_path = current_best_path
                 self.best_distance = current_best_dist
-        return self.best_path, self.best_distance
+            self.iteration += 1
+            lengths = np.array([distance for _, distance in paths])
+            estado = {
+                "iteracion": self.iteration,
+                "mejor": float(self.best_distance),
+                "actual": float(current_best_dist),
+                # Variación relativa de las longitudes: 0 cuando todas las hormigas coinciden
+                "diversidad": float(lengths.std() / lengths.mean()),
+            }
+            inst.notificar(estado)
+            yield estado
 
     def _generate_paths(self) -> List[Tuple[List[int], float]]:
+        inst = self.instrumentacion
+        if self.batched:
+            with inst.fase("construccion"):
+                tours = self._construct_paths_batched()
+            with inst.fase("distancia"):
+                distances = self._calculate_distances(tours)
+            return list(zip(tours.tolist(), distances.tolist()))
         paths = []
         for _ in range(self.n_ants):
-            path = self._construct_path()
-            distance = self._calculate_distance(path)
+            with inst.fase("construccion"):
+                path = self._construct_path()
+            with inst.fase("distancia"):
+                distance = self._calculate_distance(path)
             paths.append((path, distance))
         return paths
 
     def _construct_path(self) -> List[int]:
-        path = [np.random.randint(0, self.n_cities)]
+        if self.vectorized:
+            return self._construct_path_vectorized()
+        path = [int(self.rng.integers(0, self.n_cities))]
         visited = set(path)
         while len(visited) < self.n_cities:
             next_city = self._select_next_city(path[-1], visited)
@@ -61,99 +144,572 @@ class AntColonySystem:
 
         for i, city in enumerate(unvisited):
             pheromone = self.pheromone[current_city, city] ** self.alpha
-            heuristic = (1 / self.distances[current_city, city]) ** self.beta
-            probabilities[i] = pheromone * heuristic
+            probabilities[i] = pheromone * self.heuristic[current_city, city]
 
-        if np.random.random() < self.q0:
+        if self.rng.random() < self.q0:
             return unvisited[np.argmax(probabilities)]
         else:
             probabilities /= probabilities.sum()
-            return np.random.choice(unvisited, p=probabilities)
+            return self.rng.choice(unvisited, p=probabilities)
+
+    def _update_attractiveness(self) -> None:
+        """Precalcula la matriz τ^α·η^β usada al elegir la siguiente ciudad"""
+        self.attractiveness = self.pheromone ** self.alpha * self.heuristic
+
+    def _construct_path_vectorized(self) -> List[int]:
+        path = [int(self.rng.integers(0, self.n_cities))]
+        unvisited = np.ones(self.n_cities, dtype=bool)
+        unvisited[path[0]] = False
+        for _ in range(self.n_cities - 1):
+            next_city = self._select_next_city_vectorized(path[-1], unvisited)
+            path.append(next_city)
+            unvisited[next_city] = False
+        return path
+
+    def _select_next_city_vectorized(self, current_city: int, unvisited: np.ndarray) -> int:
+        probabilities = self.attractiveness[current_city] * unvisited
+        cumulative = np.cumsum(probabilities)
+        total = cumulative[-1]
+        if not total > 0:
+            # Atractivo nulo (p. ej. feromona agotada por subdesbordamiento): al azar entre las no visitadas
+            return int(self.rng.choice(np.flatnonzero(unvisited)))
+
+        if self.rng.random() < self.q0:
+            return int(np.argmax(probabilities))
+        # Muestreo por ruleta sobre la suma acumulada
+        return int(np.searchsorted(cumulative, self.rng.random() * total, side="right"))
+
+    def _construct_paths_batched(self) -> np.ndarray:
+        """Construye los recorridos de todas las hormigas a la vez (n_ants × n_cities)"""
+        ants = np.arange(self.n_ants)
+        tours = np.empty((self.n_ants, self.n_cities), dtype=np.intp)
+        visited = np.zeros((self.n_ants, self.n_cities), dtype=bool)
+        tours[:, 0] = self.rng.integers(0, self.n_cities, self.n_ants)
+        visited[ants, tours[:, 0]] = True
+
+        for step in range(1, self.n_cities):
+            probabilities = self.attractiveness[tours[:, step - 1]] * ~visited
+            cumulative = np.cumsum(probabilities, axis=1)
+            total = cumulative[:, -1]
+            # Atractivo nulo (feromona agotada) o no finito (desbordamiento de τ^α·η^β):
+            # la ruleta no sirve; la comparación así escrita también recoge un total NaN
+            stuck = ~((total > 0) & (total < np.inf))
+            if stuck.any():
+                # Repartir uniformemente entre las no visitadas
+                probabilities[stuck] = ~visited[stuck]
+                cumulative[stuck] = np.cumsum(probabilities[stuck], axis=1)
+                total = cumulative[:, -1]
+
+            greedy = np.argmax(probabilities, axis=1)
+            threshold = self.rng.random(self.n_ants) * total
+            sampled = (cumulative <= threshold[:, None]).sum(axis=1)
+            exploit = self.rng.random(self.n_ants) < self.q0
+            next_cities = np.where(exploit, greedy, sampled)
+
+            tours[:, step] = next_cities
+            visited[ants, next_cities] = True
+        return tours
 
     def _calculate_distance(self, path: List[int]) -> float:
-        total_distance = 0.0
-        for i in range(len(path) - 1):
-            total_distance += self.distances[path[i], path[i + 1]]
-        total_distance += self.distances[path[-1], path[0]]
-        return total_distance
+        path = np.asarray(path)
+        return float(self.distances[path, np.roll(path, -1)].sum())
+
+    def _calculate_distances(self, tours: np.ndarray) -> np.ndarray:
+        return self.distances[tours, np.roll(tours, -1, axis=1)].sum(axis=1)
 
     def _update_pheromone(self, paths: List[Tuple[List[int], float]]) -> None:
         self.pheromone *= self.decay
         for path, distance in paths:
-            for i in range(len(path) - 1):
-                self.pheromone[path[i], path[i + 1]] += 1 / distance
-            self.pheromone[path[-1], path[0]] += 1 / distance
+            path = np.asarray(path)
+            np.add.at(self.pheromone, (path, np.roll(path, -1)), 1 / distance)
 
-    def plot_path(self, cities: np.ndarray) -> str:
+    def _improve_paths(self, paths: List[Tuple[List[int], float]]) -> List[Tuple[List[int], float]]:
+        """Aplica 2-opt y Or-opt a todos los recorridos ("all") o solo al mejor ("best")"""
+        if self.local_search == "best":
+            selected = [min(range(len(paths)), key=lambda i: paths[i][1])]
+        elif self.local_search == "all":
+            selected = range(len(paths))
+        else:
+            raise ValueError(f"local_search desconocido: {self.local_search}")
+
+        neighbors = self._neighbor_lists()
+        paths = list(paths)
+        for i in selected:
+            path, distance = paths[i]
+            path, gain = local_search(path, self._edge_length, neighbors)
+            paths[i] = (path, distance - gain)
+        return paths
+
+    def _neighbor_lists(self, k: int = 10) -> List[List[int]]:
+        if self.neighbors is None:
+            k = min(k, self.n_cities - 1)
+            d = np.array(self.distances, dtype=float)
+            np.fill_diagonal(d, np.inf)
+            nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(d, nearest, axis=1), axis=1)
+            self.neighbors = np.take_along_axis(nearest, order, axis=1).tolist()
+        return self.neighbors
+
+    def _edge_length(self, i: int, j: int) -> float:
+        return self.distances[i, j]
+
+    def plot_path(self, cities: np.ndarray, max_labels: int = 100) -> str:
         """Genera un gráfico de la ruta y lo devuelve como imagen en base64"""
-        plt.figure(figsize=(10, 6))
-        plt.scatter(cities[:, 0], cities[:, 1], c="red", s=100)
-        
-        # Dibujar todas las ciudades con etiquetas
-        for i, city in enumerate(cities):
-            plt.annotate(str(i), (city[0] + 1, city[1] + 1))
+        return base64.b64encode(self.render_path(cities, max_labels)).decode()
+
+    def render_path(self, cities: np.ndarray, max_labels: int = 100) -> bytes:
+        """Genera un gráfico de la ruta y lo devuelve como bytes PNG"""
+        # matplotlib solo se importa si de verdad se pide un gráfico
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        ax.scatter(cities[:, 0], cities[:, 1], c="red", s=100)
         
-        # Dibujar la mejor ruta
-        for i in range(len(self.best_path) - 1):
-            plt.plot(
-                [cities[self.best_path[i], 0], cities[self.best_path[i + 1], 0]],
-                [cities[self.best_path[i], 1], cities[self.best_path[i + 1], 1]],
-                "b-",
-            )
+        # Etiquetas de las ciudades (solo en instancias pequeñas)
+        if len(cities) <= max_labels:
+            for i, city in enumerate(cities):
+                ax.annotate(str(i), (city[0] + 1, city[1] + 1))
         
-        # Cierre del ciclo
-        plt.plot(
-            [cities[self.best_path[-1], 0], cities[self.best_path[0], 0]],
-            [cities[self.best_path[-1], 1], cities[self.best_path[0], 1]],
-            "b-",
-        )
+        # Dibujar la mejor ruta, cierre del ciclo incluido, como una sola colección
+        path = np.asarray(self.best_path)
+        segments = np.stack([cities[path], cities[np.roll(path, -1)]], axis=1)
+        ax.add_collection(LineCollection(segments, colors="b"))
         
-        plt.title(f"Mejor ruta encontrada (Distancia: {self.best_distance:.2f})")
+        ax.set_title(f"Mejor ruta encontrada (Distancia: {self.best_distance:.2f})")
         
-        # Convertir a base64 para Streamlit
         buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        img_str = base64.b64encode(buf.read()).decode()
-        plt.close()
-        return img_str
+        fig.savefig(buf, format='png')
+        return buf.getvalue()
+
+
+def _island_worker(
+    island: int,
+    n_islands: int,
+    shm_names: Tuple[str, str, str],
+    distances: np.ndarray,
+    iterations: int,
+    migration_interval: int,
+    blend: float,
+    seed: Optional[int],
+    barrier,
+    acs_kwargs: dict,
+) -> None:
+    """Ejecuta una colonia cuya feromona vive en memoria compartida con las demás islas"""
+    n_cities = len(distances)
+    blocks = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    try:
+        pheromones = np.ndarray((n_islands, n_cities, n_cities), dtype=np.float64, buffer=blocks[0].buf)
+        best_paths = np.ndarray((n_islands, n_cities), dtype=np.int64, buffer=blocks[1].buf)
+        best_distances = np.ndarray((n_islands,), dtype=np.float64, buffer=blocks[2].buf)
+
+        acs = AntColonySystem(
+            distances,
+            iterations=migration_interval,
+            seed=None if seed is None else seed + island,
+            **acs_kwargs,
+        )
+        pheromones[island] = acs.pheromone
+        acs.pheromone = pheromones[island]
+        neighbor = (island - 1) % n_islands
+
+        remaining = iterations
+        while remaining > 0:
+            acs.iterations = min(migration_interval, remaining)
+            remaining -= acs.iterations
+            acs.run()
+            best_paths[island] = acs.best_path
+            best_distances[island] = acs.best_distance
+
+            # Migración en anillo: todas las islas leen antes de que ninguna escriba
+            barrier.wait()
+            blended = (1 - blend) * acs.pheromone + blend * pheromones[neighbor]
+            migrant_path = best_paths[neighbor].copy()
+            migrant_distance = float(best_distances[neighbor])
+            barrier.wait()
+
+            acs.pheromone[:] = blended
+            np.add.at(acs.pheromone, (migrant_path, np.roll(migrant_path, -1)), 1 / migrant_distance)
+            if migrant_distance < acs.best_distance:
+                acs.best_path = migrant_path.tolist()
+                acs.best_distance = migrant_distance
+            if acs.vectorized or acs.batched:
+                acs._update_attractiveness()
+    except Exception:
+        # Libera a las demás islas si esta falla antes de llegar a la barrera
+        barrier.abort()
+        raise
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def run_islands(
+    distances: np.ndarray,
+    n_islands: Optional[int] = None,
+    iterations: int = 100,
+    migration_interval: int = 10,
+    blend: float = 0.1,
+    seed: Optional[int] = None,
+    **acs_kwargs,
+) -> Tuple[List[int], float]:
+    """Modelo de islas: varias colonias en procesos separados que cada
+    `migration_interval` iteraciones mezclan feromona con su vecina y
+    reciben su mejor ruta. Devuelve la mejor ruta global y su distancia."""
+    if n_islands is None:
+        n_islands = os.cpu_count() or 1
+    if n_islands < 1:
+        raise ValueError(f"n_islands debe ser al menos 1: {n_islands}")
+    if migration_interval < 1:
+        raise ValueError(f"migration_interval debe ser al menos 1: {migration_interval}")
+    n_cities = len(distances)
+    sizes = (
+        n_islands * n_cities * n_cities * np.dtype(np.float64).itemsize,
+        n_islands * n_cities * np.dtype(np.int64).itemsize,
+        n_islands * np.dtype(np.float64).itemsize,
+    )
+    blocks = [shared_memory.SharedMemory(create=True, size=size) for size in sizes]
+    try:
+        best_paths = np.ndarray((n_islands, n_cities), dtype=np.int64, buffer=blocks[1].buf)
+        best_distances = np.ndarray((n_islands,), dtype=np.float64, buffer=blocks[2].buf)
+        best_distances[:] = np.inf
+
+        barrier = mp.Barrier(n_islands)
+        processes = [
+            mp.Process(
+                target=_island_worker,
+                args=(
+                    island, n_islands, tuple(block.name for block in blocks), distances,
+                    iterations, migration_interval, blend, seed, barrier, acs_kwargs,
+                ),
+            )
+            for island in range(n_islands)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        if any(process.exitcode != 0 for process in processes):
+            raise RuntimeError("Una de las colonias terminó con error")
+
+        best = int(np.argmin(best_distances))
+        best_path, best_distance = best_paths[best].tolist(), float(best_distances[best])
+        del best_paths, best_distances
+        return best_path, best_distance
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def _reverse(tour: List[int], pos: List[int], i: int, j: int) -> None:
+    """Invierte el tramo circular tour[i..j]; si es más corto, invierte el complementario"""
+    n = len(tour)
+    length = (j - i) % n + 1
+    if 2 * length > n:
+        i, j = (j + 1) % n, (i - 1) % n
+        length = n - length
+    for _ in range(length // 2):
+        a, b = tour[i], tour[j]
+        tour[i], tour[j] = b, a
+        pos[a], pos[b] = j, i
+        i = (i + 1) % n
+        j = (j - 1) % n
+
+
+def two_opt(tour: List[int], dist: Callable[[int, int], float], neighbors: Sequence[Sequence[int]]) -> float:
+    """2-opt con listas de vecinos y bits de no-mirar. Modifica `tour` y devuelve la mejora."""
+    n = len(tour)
+    if n < 4:
+        return 0.0
+    pos = [0] * n
+    for idx, city in enumerate(tour):
+        pos[city] = idx
+    queue = deque(tour)
+    active = [True] * n
+    total_gain = 0.0
+
+    while queue:
+        a = queue.popleft()
+        active[a] = False
+        improved = False
+        for forward in (True, False):
+            # forward: ... a b ... c d ...  ->  ... a c ... b d ...
+            # backward: ... b a ... d c ... ->  ... b d ... a c ...
+            b = tour[(pos[a] + 1) % n] if forward else tour[pos[a] - 1]
+            d_ab = dist(a, b)
+            for c in neighbors[a]:
+                if c == a:
+                    continue
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    break
+                d = tour[(pos[c] + 1) % n] if forward else tour[pos[c] - 1]
+                if c == b or d == a:
+                    continue
+                delta = d_ab + dist(c, d) - d_ac - dist(b, d)
+                if delta > 1e-10:
+                    if forward:
+                        _reverse(tour, pos, pos[b], pos[c])
+                    else:
+                        _reverse(tour, pos, pos[a], pos[d])
+                    total_gain += delta
+                    for city in (a, b, c, d):
+                        if not active[city]:
+                            active[city] = True
+                            queue.append(city)
+                    improved = True
+                    break
+            if improved:
+                break
+    return total_gain
+
+
+def or_opt(
+    tour: List[int],
+    dist: Callable[[int, int], float],
+    neighbors: Sequence[Sequence[int]],
+    max_segment: int = 3,
+) -> float:
+    """Or-opt: mueve tramos de 1 a `max_segment` ciudades junto a un vecino cercano,
+    en cualquier orientación. Modifica `tour` y devuelve la mejora."""
+    n = len(tour)
+    if n < max_segment + 3:
+        return 0.0
+    pos = [0] * n
+    for idx, city in enumerate(tour):
+        pos[city] = idx
+    queue = deque(tour)
+    active = [True] * n
+    total_gain = 0.0
+
+    while queue:
+        s1 = queue.popleft()
+        active[s1] = False
+        for length in range(1, max_segment + 1):
+            i = pos[s1]
+            segment = [tour[(i + k) % n] for k in range(length)]
+            s2 = segment[-1]
+            p = tour[i - 1]
+            nx = tour[(i + length) % n]
+            removal_gain = dist(p, s1) + dist(s2, nx) - dist(p, nx)
+            if removal_gain <= 1e-10:
+                continue
+
+            move = None
+            for c in neighbors[s1]:
+                if c in segment:
+                    continue
+                # Vecinos de c en el recorrido sin el tramo
+                c_next = nx if c == p else tour[(pos[c] + 1) % n]
+                c_prev = p if c == nx else tour[pos[c] - 1]
+                # c, s1..s2, c_next  (tramo en su orientación)
+                if c != p:
+                    delta = removal_gain + dist(c, c_next) - dist(c, s1) - dist(s2, c_next)
+                    if delta > 1e-10:
+                        move = (c, segment, delta)
+                        break
+                # c_prev, s2..s1, c  (tramo invertido)
+                if c != nx:
+                    delta = removal_gain + dist(c_prev, c) - dist(c_prev, s2) - dist(s1, c)
+                    if delta > 1e-10:
+                        move = (c_prev, segment[::-1], delta)
+                        break
+            if move is None:
+                continue
+
+            after, moved, delta = move
+            rest = [tour[(i + length + k) % n] for k in range(n - length)]
+            j = rest.index(after) + 1
+            tour[:] = rest[:j] + moved + rest[j:]
+            for idx, city in enumerate(tour):
+                pos[city] = idx
+            total_gain += delta
+            for city in (p, nx, after, s1, s2):
+                if not active[city]:
+                    active[city] = True
+                    queue.append(city)
+            break
+    return total_gain
+
+
+def local_search(
+    path: Sequence[int],
+    dist: Callable[[int, int], float],
+    neighbors: Sequence[Sequence[int]],
+) -> Tuple[List[int], float]:
+    """Alterna 2-opt y Or-opt hasta que ninguno mejora. Devuelve (ruta, mejora total)."""
+    tour = list(path)
+    total_gain = 0.0
+    while True:
+        gain = two_opt(tour, dist, neighbors) + or_opt(tour, dist, neighbors)
+        total_gain += gain
+        if gain <= 1e-10:
+            return tour, total_gain
+
+
+def nearest_neighbors(cities: np.ndarray, k: int, chunk_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """Devuelve los índices y distancias de las k ciudades más cercanas a cada ciudad"""
+    n_cities = len(cities)
+    k = min(k, n_cities - 1)
+    if cKDTree is not None:
+        dist, idx = cKDTree(cities).query(cities, k=k + 1)
+        # Con ciudades repetidas la propia ciudad no tiene por qué salir la primera:
+        # se quita explícitamente (o el último vecino si quedó fuera de los k+1)
+        keep = idx != np.arange(n_cities)[:, None]
+        keep[keep.all(axis=1), -1] = False
+        return idx[keep].reshape(n_cities, k), dist[keep].reshape(n_cities, k)
+
+    # Sin KD-tree: fuerza bruta por bloques para no crear la matriz n×n completa
+    idx = np.empty((n_cities, k), dtype=np.intp)
+    dist = np.empty((n_cities, k))
+    for start in range(0, n_cities, chunk_size):
+        block = cities[start:start + chunk_size]
+        d = np.linalg.norm(block[:, None, :] - cities[None, :, :], axis=-1)
+        d[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+        nearest_d = np.take_along_axis(d, nearest, axis=1)
+        order = np.argsort(nearest_d, axis=1)
+        idx[start:start + chunk_size] = np.take_along_axis(nearest, order, axis=1)
+        dist[start:start + chunk_size] = np.take_along_axis(nearest_d, order, axis=1)
+    return idx, dist
+
+
+class SparseAntColonySystem(AntColonySystem):
+    """ACS con listas de candidatos: la feromona solo se guarda para las
+    aristas hacia los k vecinos más cercanos, con memoria O(n·k)."""
+
+    def __init__(
+        self,
+        cities: np.ndarray,
+        n_neighbors: int = 15,
+        n_ants: int = 10,
+        iterations: int = 100,
+        decay: float = 0.95,
+        alpha: float = 1.0,
+        beta: float = 2.0,
+        q0: float = 0.9,
+        local_search: Optional[str] = None,
+        seed=None,
+        instrumentacion=None,
+    ):
+        self.cities = np.asarray(cities, dtype=float)
+        self.n_neighbors = n_neighbors
+        # Sin matriz de distancias: _init_edges solo guarda las aristas candidatas
+        super().__init__(
+            None, n_ants=n_ants, iterations=iterations, decay=decay, alpha=alpha, beta=beta,
+            q0=q0, local_search=local_search, seed=seed, instrumentacion=instrumentacion,
+        )
+
+    def _init_edges(self) -> None:
+        """Feromona y heurística solo de las aristas hacia los k vecinos (matrices n×k)"""
+        self.n_cities = len(self.cities)
+        self.pheromone_init = 1 / self.n_cities
+        self.candidates, candidate_distances = nearest_neighbors(self.cities, self.n_neighbors)
+        self.heuristic = _heuristic(candidate_distances, self.beta)
+        self.pheromone = np.full(self.candidates.shape, self.pheromone_init)
+        self.neighbors = self.candidates.tolist()
+        self.coordinates = self.cities.tolist()
+
+    def _edge_length(self, i: int, j: int) -> float:
+        return math.dist(self.coordinates[i], self.coordinates[j])
+
+    def _construct_path(self) -> List[int]:
+        path = [int(self.rng.integers(0, self.n_cities))]
+        unvisited = np.ones(self.n_cities, dtype=bool)
+        unvisited[path[0]] = False
+        for _ in range(self.n_cities - 1):
+            next_city = self._select_next_city(path[-1], unvisited)
+            path.append(next_city)
+            unvisited[next_city] = False
+        return path
+
+    def _select_next_city(self, current_city: int, unvisited: np.ndarray) -> int:
+        candidates = self.candidates[current_city]
+        available = unvisited[candidates]
+        if not available.any():
+            # Todos los candidatos visitados: regla ACS sobre todas las no visitadas, con
+            # la feromona inicial τ0 (las aristas fuera de la lista no guardan feromona)
+            remaining = np.flatnonzero(unvisited)
+            d = np.linalg.norm(self.cities[remaining] - self.cities[current_city], axis=1)
+            probabilities = self.pheromone_init ** self.alpha * _heuristic(d, self.beta)
+            return int(remaining[self._acs_choice(probabilities)])
+
+        probabilities = (
+            self.pheromone[current_city] ** self.alpha * self.heuristic[current_city] * available
+        )
+        return int(candidates[self._acs_choice(probabilities)])
+
+    def _acs_choice(self, probabilities: np.ndarray) -> int:
+        """Regla ACS: con probabilidad q0 la arista más atractiva, si no ruleta"""
+        if self.rng.random() < self.q0:
+            return int(np.argmax(probabilities))
+        cumulative = np.cumsum(probabilities)
+        return int(np.searchsorted(cumulative, self.rng.random() * cumulative[-1], side="right"))
+
+    def _calculate_distance(self, path: List[int]) -> float:
+        path = np.asarray(path)
+        return float(np.linalg.norm(self.cities[path] - self.cities[np.roll(path, -1)], axis=1).sum())
+
+    def _update_pheromone(self, paths: List[Tuple[List[int], float]]) -> None:
+        self.pheromone *= self.decay
+        for path, distance in paths:
+            path = np.asarray(path)
+            # Solo las aristas que están en la lista de candidatos tienen feromona propia
+            match = self.candidates[path] == np.roll(path, -1)[:, None]
+            rows, cols = np.nonzero(match)
+            np.add.at(self.pheromone, (path[rows], cols), 1 / distance)
+
+
+def ejecutar(n_ants, iterations, seed=None, imagen=True) -> List[tuple]:
+    """Punto de entrada para el menú: devuelve las salidas como (tipo, clave, valor)"""
+    return protocolo.consumir(ejecutar_por_pasos(n_ants, iterations, seed, imagen))
+
+def ejecutar_por_pasos(n_ants, iterations, seed=None, imagen=True):
+    """Como ejecutar, pero produce el estado de cada iteración y devuelve las salidas al terminar.
+    Con imagen=False no se dibuja la gráfica (barridos de parámetros)."""
+    n_ants = int(n_ants)
+    iterations = int(iterations)
+    
+    # Configuración del problema
+    n_cities = 15
+    rng = np.random.default_rng(seed)
+    cities = rng.random((n_cities, 2)) * 100
+    distances = np.linalg.norm(cities[:, None, :] - cities[None, :, :], axis=-1)
+    
+    # Ejecutar algoritmo
+    acs = AntColonySystem(
+        distances,
+        n_ants=n_ants,
+        iterations=iterations,
+        q0=0.8,
+        seed=rng,
+    )
+    
+    yield from acs.steps()
+    best_path, best_distance = acs.best_path, acs.best_distance
+    
+    resultados = [
+        ("success", "Mejor distancia", round(float(best_distance), 2)),
+        ("array", "Mejor ruta", np.asarray(best_path)),
+    ]
+    if imagen:
+        resultados.append(("image", "Ruta visual", acs.render_path(cities)))
+    return resultados
 
 if __name__ == "__main__":
     # Verificar argumentos de línea de comandos
-    if len(sys.argv) != 3:
-        print("error|Uso: python algoritmo_hormiguero.py <n_ants> <iterations>")
+    binario = "--binario" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--binario"]
+    if len(args) != 2:
+        print("error|Uso: python algoritmo_hormiguero.py <n_ants> <iterations> [--binario]")
         sys.exit(1)
     
     try:
-        # Parámetros desde línea de comandos
-        n_ants = int(sys.argv[1])
-        iterations = int(sys.argv[2])
-        
-        # Configuración del problema
-        n_cities = 15
-        cities = np.random.rand(n_cities, 2) * 100
-        distances = np.zeros((n_cities, n_cities))
-        
-        for i in range(n_cities):
-            for j in range(n_cities):
-                distances[i, j] = np.linalg.norm(cities[i] - cities[j])
-        
-        # Ejecutar algoritmo
-        acs = AntColonySystem(
-            distances,
-            n_ants=n_ants,
-            iterations=iterations,
-            q0=0.8
-        )
-        
-        best_path, best_distance = acs.run()
-        img_str = acs.plot_path(cities)
-        
         # Salida para Streamlit
-        print(f"Mejor distancia {best_distance:.2f}")
-        print(f"Mejor ruta {','.join(map(str, best_path))}")
-        print(f"image|Ruta visual|{img_str}")
+        protocolo.imprimir(ejecutar(*args), binario)
         
     except Exception as e:
-        print(f"error|{str(e)}")
-        sys.exit(1)
\ No newline at end of file
+        protocolo.imprimir([("error", "Error", str(e))], binario)
+        sys.exit(1)
@@ -4,30 +4,55 @@ Algoritmo Inmune Adaptado para Streamlit
 import random
 import sys
 
+import numpy as np
+
+import protocolo
+from bits import popcount
+from instrumentacion import NULA
+
 def calcular_afinidad(anticuerpo, antigeno):
     return sum(1 for a, b in zip(anticuerpo, antigeno) if a == b) / len(anticuerpo)
 
-def crear_anticuerpo(longitud):
-    return ''.join(random.choice('01') for _ in range(longitud))
+def crear_anticuerpo(longitud, rng=random):
+    return ''.join(rng.choice('01') for _ in range(longitud))
+
+def sistema_inmune_artificial(num_anticuerpos, umbral, seed=None, instrumentacion=None):
+    resultados = {
+        'detectadas': 0,
+        'mejor_afinidad': 0,
+        'evolucion': []
+    }
+    for estado in sistema_inmune_pasos(num_anticuerpos, umbral, seed, instrumentacion):
+        resultados['detectadas'] = estado['detecciones']
+        resultados['mejor_afinidad'] = estado['mejor_afinidad']
+        resultados['evolucion'].append({
+            'generacion': estado['generacion'],
+            'poblacion': estado['poblacion'],
+            'detecciones': estado['detecciones']
+        })
+    resultados['poblacion_final'] = estado['poblacion']
+    return resultados
 
-def sistema_inmune_artificial(num_anticuerpos, umbral):
+def sistema_inmune_pasos(num_anticuerpos, umbral, seed=None, instrumentacion=None):
+    """Igual que sistema_inmune_artificial, pero produce el estado tras cada generación"""
+    inst = instrumentacion or NULA
     # Configuración
     LONGITUD = 10
     GENERACIONES = 10
     TASA_MUTACION = 0.1
+    rng = random.Random(seed)
     
     # 1. Generar datos (80% normales, 20% anomalías)
-    normales = [crear_anticuerpo(LONGITUD) for _ in range(num_anticuerpos)]
+    normales = [crear_anticuerpo(LONGITUD, rng) for _ in range(num_anticuerpos)]
     anomalias = [''.join('1' if c == '0' else '0' for c in ab) for ab in normales[:int(num_anticuerpos*0.2)]]
     antigenos = normales + anomalias
-    random.shuffle(antigenos)
+    rng.shuffle(antigenos)
     
     # 2. Población inicial
-    poblacion = [crear_anticuerpo(LONGITUD) for _ in range(num_anticuerpos)]
+    poblacion = [crear_anticuerpo(LONGITUD, rng) for _ in range(num_anticuerpos)]
     resultados = {
         'detectadas': 0,
-        'mejor_afinidad': 0,
-        'evolucion': []
+        'mejor_afinidad': 0
     }
 
     # 3. Proceso evolutivo
@@ -36,56 +61,281 @@ def sistema_inmune_artificial(num_anticuerpos, umbral):
             mejor_afinidad = 0
             mejor_anticuerpo = None
             
-            for anticuerpo in poblacion:
-                afinidad = calcular_afinidad(anticuerpo, antigeno)
-                
-                if afinidad < umbral:
-                    resultados['detectadas'] += 1
-                
-                if afinidad > mejor_afinidad:
-                    mejor_afinidad = afinidad
-                    mejor_anticuerpo = anticuerpo
+            # Una llamada a calcular_afinidad por anticuerpo
+            inst.contar('calcular_afinidad', len(poblacion))
+            with inst.fase('afinidad'):
+                for anticuerpo in poblacion:
+                    afinidad = calcular_afinidad(anticuerpo, antigeno)
+                    
+                    if afinidad < umbral:
+                        resultados['detectadas'] += 1
+                    
+                    if afinidad > mejor_afinidad:
+                        mejor_afinidad = afinidad
+                        mejor_anticuerpo = anticuerpo
             
             if mejor_anticuerpo:
-                nuevo = ''.join(
-                    c if random.random() > TASA_MUTACION else '1' if c == '0' else '0'
-                    for c in mejor_anticuerpo
-                )
-                poblacion.append(nuevo)
+                with inst.fase('clonacion'):
+                    nuevo = ''.join(
+                        c if rng.random() > TASA_MUTACION else '1' if c == '0' else '0'
+                        for c in mejor_anticuerpo
+                    )
+                    poblacion.append(nuevo)
                 resultados['mejor_afinidad'] = max(resultados['mejor_afinidad'], mejor_afinidad)
         
-        resultados['evolucion'].append({
+        estado = {
             'generacion': generacion,
             'poblacion': len(poblacion),
+            'detecciones': resultados['detectadas'],
+            'mejor_afinidad': resultados['mejor_afinidad'],
+            # Fracción de anticuerpos distintos
+            'diversidad': len(set(poblacion)) / len(poblacion)
+        }
+        inst.notificar(estado)
+        yield estado
+
+# Versión vectorizada: anticuerpos y antígenos como matrices de bits empaquetados
+def matriz_afinidad(antigenos, poblacion, longitud):
+    """Afinidad de cada antígeno con cada anticuerpo (XOR + popcount), forma (antígenos × anticuerpos)"""
+    distintos = popcount(antigenos[:, None, :] ^ poblacion[None, :, :]).sum(axis=2, dtype=np.int64)
+    return (longitud - distintos) / longitud
+
+POLITICAS_DESALOJO = ('afinidad', 'uso', 'edad')
+
+def desalojar(puntuacion, ultimo_uso, edad, maximo, politica):
+    """
+    Índices de los anticuerpos que se conservan cuando el repertorio supera `maximo`:
+    - 'afinidad': se eliminan los de menor afinidad
+    - 'uso': se eliminan los que hace más tiempo que no reconocen un antígeno
+    - 'edad': se eliminan los más antiguos
+    """
+    if politica == 'afinidad':
+        clave = puntuacion
+    elif politica == 'uso':
+        clave = ultimo_uso
+    elif politica == 'edad':
+        clave = edad
+    else:
+        raise ValueError(f"Política de desalojo desconocida: {politica}")
+    # Orden estable: ante empate se conservan los más recientes
+    orden = np.argsort(clave, kind='stable')
+    return np.sort(orden[-maximo:])
+
+class Repertorio:
+    """
+    Anticuerpos empaquetados junto con los metadatos que usa la política de desalojo.
+    `reloj` avanza una unidad por generación de entrenamiento y por lote de
+    streaming, así que las marcas de uso y edad crecen siempre.
+    """
+
+    def __init__(self, poblacion, longitud):
+        self.poblacion = poblacion
+        self.longitud = longitud
+        self.reloj = 0
+        self.puntuacion = np.zeros(len(poblacion))
+        self.ultimo_uso = np.full(len(poblacion), -1)
+        self.edad = np.zeros(len(poblacion), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.poblacion)
+
+    def avanzar(self):
+        self.reloj += 1
+
+    def expandir(self, mejores, afinidades, rng, clones_max=5, tasa_mutacion=0.1):
+        """Expansión clonal: cada ganador genera más clones cuanto mayor es su afinidad"""
+        self.ultimo_uso[mejores] = self.reloj
+        n_clones = np.maximum(1, np.rint(clones_max * afinidades).astype(np.int64))
+        padres = np.repeat(mejores, n_clones)
+        clones = np.unpackbits(self.poblacion[padres], axis=1, count=self.longitud)
+        clones ^= (rng.random(clones.shape) < tasa_mutacion).astype(np.uint8)
+        self.poblacion = np.concatenate([self.poblacion, np.packbits(clones, axis=1)])
+        self.puntuacion = np.concatenate([self.puntuacion, self.puntuacion[padres]])
+        self.ultimo_uso = np.concatenate([self.ultimo_uso, np.full(len(padres), self.reloj)])
+        self.edad = np.concatenate([self.edad, np.full(len(padres), self.reloj + 1)])
+
+    def recortar(self, maximo, politica):
+        if maximo is None or len(self) <= maximo:
+            return
+        conservar = desalojar(self.puntuacion, self.ultimo_uso, self.edad, maximo, politica)
+        self.poblacion = self.poblacion[conservar]
+        self.puntuacion = self.puntuacion[conservar]
+        self.ultimo_uso = self.ultimo_uso[conservar]
+        self.edad = self.edad[conservar]
+
+def sistema_inmune_vectorizado(num_anticuerpos, umbral, seed=None,
+                               max_repertorio=None, politica='afinidad', clones_max=5,
+                               devolver_repertorio=False, instrumentacion=None):
+    """
+    Igual que sistema_inmune_artificial pero calcula toda la matriz de afinidad
+    de cada generación de una vez. Los clones de una generación se añaden al
+    final de esta, no a mitad de recorrido de los antígenos.
+
+    Cada anticuerpo ganador genera hasta `clones_max` clones, proporcional a su
+    afinidad. Con `max_repertorio` el repertorio se recorta tras cada generación
+    según `politica` ('afinidad', 'uso' o 'edad'). Con `devolver_repertorio` el
+    Repertorio entrenado se incluye en resultados['repertorio'].
+    """
+    inst = instrumentacion or NULA
+    LONGITUD = 10
+    GENERACIONES = 10
+    TASA_MUTACION = 0.1
+    rng = np.random.default_rng(seed)
+
+    # 1. Generar datos (80% normales, 20% anomalías)
+    normales = rng.integers(0, 2, (num_anticuerpos, LONGITUD), dtype=np.uint8)
+    anomalias = 1 - normales[:int(num_anticuerpos*0.2)]
+    antigenos = np.concatenate([normales, anomalias])
+    rng.shuffle(antigenos)
+    antigenos = np.packbits(antigenos, axis=1)
+
+    # 2. Población inicial
+    repertorio = Repertorio(
+        np.packbits(rng.integers(0, 2, (num_anticuerpos, LONGITUD), dtype=np.uint8), axis=1),
+        LONGITUD,
+    )
+    resultados = {
+        'detectadas': 0,
+        'mejor_afinidad': 0,
+        'evolucion': []
+    }
+
+    # 3. Proceso evolutivo
+    for generacion in range(GENERACIONES):
+        # Cada celda de la matriz equivale a una llamada a calcular_afinidad
+        inst.contar('calcular_afinidad', len(antigenos) * len(repertorio))
+        with inst.fase('afinidad'):
+            afinidad = matriz_afinidad(antigenos, repertorio.poblacion, LONGITUD)
+        resultados['detectadas'] += int((afinidad < umbral).sum())
+        repertorio.puntuacion = afinidad.max(axis=0)
+
+        mejores = afinidad.argmax(axis=1)
+        afinidad_mejores = afinidad[np.arange(len(antigenos)), mejores]
+        reconocidos = afinidad_mejores > 0
+        if reconocidos.any():
+            with inst.fase('clonacion'):
+                repertorio.expandir(mejores[reconocidos], afinidad_mejores[reconocidos],
+                                    rng, clones_max, TASA_MUTACION)
+            resultados['mejor_afinidad'] = max(resultados['mejor_afinidad'], float(afinidad.max()))
+        with inst.fase('recorte'):
+            repertorio.recortar(max_repertorio, politica)
+        repertorio.avanzar()
+
+        resultados['evolucion'].append({
+            'generacion': generacion,
+            'poblacion': len(repertorio),
             'detecciones': resultados['detectadas']
         })
+        inst.notificar(resultados['evolucion'][-1])
 
-    resultados['poblacion_final'] = len(poblacion)
+    resultados['poblacion_final'] = len(repertorio)
+    if devolver_repertorio:
+        resultados['repertorio'] = repertorio
     return resultados
 
+# Modo streaming: puntuar antígenos de una fuente externa con memoria acotada
+def abrir_binario(ruta, longitud):
+    """Abre un archivo de antígenos empaquetados (uint8, ceil(longitud/8) bytes por registro) como memmap"""
+    return np.memmap(ruta, dtype=np.uint8, mode='r').reshape(-1, (longitud + 7) // 8)
+
+def lotes_empaquetados(fuente, longitud, tam_lote):
+    """
+    Divide la fuente en lotes empaquetados. La fuente puede ser una matriz
+    (o memmap) de registros ya empaquetados, o cualquier iterable de cadenas
+    de 0s y 1s (por ejemplo, las líneas de un archivo o de una tubería).
+    """
+    if isinstance(fuente, np.ndarray):
+        n_bytes = (longitud + 7) // 8
+        if fuente.ndim != 2 or fuente.shape[1] != n_bytes:
+            raise ValueError(f"Se esperaban registros de {n_bytes} bytes (longitud {longitud}), "
+                             f"la fuente tiene forma {fuente.shape}")
+        for inicio in range(0, len(fuente), tam_lote):
+            yield np.asarray(fuente[inicio:inicio + tam_lote])
+        return
+
+    lote = []
+    for n, registro in enumerate(fuente):
+        if isinstance(registro, bytes):
+            registro = registro.decode()
+        registro = registro.strip()
+        if not registro:
+            continue
+        if len(registro) != longitud:
+            raise ValueError(f"Registro {n}: longitud {len(registro)}, se esperaba {longitud}")
+        lote.append([c == '1' for c in registro])
+        if len(lote) == tam_lote:
+            yield np.packbits(np.array(lote, dtype=np.uint8), axis=1)
+            lote = []
+    if lote:
+        yield np.packbits(np.array(lote, dtype=np.uint8), axis=1)
+
+def detectar_stream(repertorio, fuente, umbral, tam_lote=4096, actualizar=False,
+                    max_repertorio=None, politica='uso', clones_max=5, seed=None, instrumentacion=None):
+    """
+    Puntúa antígenos leídos de `fuente` por lotes de `tam_lote` con un
+    Repertorio ya entrenado. Produce (es_anomalia, afinidad) por registro, donde
+    la afinidad es la del mejor anticuerpo. Con `actualizar` los registros
+    normales clonan a su mejor anticuerpo y el repertorio se recorta a
+    `max_repertorio`, de modo que la memoria queda acotada.
+    """
+    inst = instrumentacion or NULA
+    rng = np.random.default_rng(seed)
+    for lote in lotes_empaquetados(fuente, repertorio.longitud, tam_lote):
+        inst.contar('calcular_afinidad', len(lote) * len(repertorio))
+        with inst.fase('afinidad'):
+            afinidad = matriz_afinidad(lote, repertorio.poblacion, repertorio.longitud)
+        mejores = afinidad.argmax(axis=1)
+        afinidad_mejores = afinidad[np.arange(len(lote)), mejores]
+        anomalias = afinidad_mejores < umbral
+
+        for es_anomalia, valor in zip(anomalias.tolist(), afinidad_mejores.tolist()):
+            yield es_anomalia, valor
+
+        if actualizar:
+            normales = ~anomalias
+            if normales.any():
+                repertorio.puntuacion = np.maximum(repertorio.puntuacion, afinidad.max(axis=0))
+                with inst.fase('clonacion'):
+                    repertorio.expandir(mejores[normales], afinidad_mejores[normales], rng, clones_max)
+            with inst.fase('recorte'):
+                repertorio.recortar(max_repertorio, politica)
+            repertorio.avanzar()
+
+def ejecutar(anticuerpos, umbral, seed=None):
+    """Punto de entrada para el menú: devuelve las salidas como (tipo, clave, valor)"""
+    return protocolo.consumir(ejecutar_por_pasos(anticuerpos, umbral, seed))
+
+def ejecutar_por_pasos(anticuerpos, umbral, seed=None):
+    """Como ejecutar, pero produce el estado de cada generación y devuelve las salidas al terminar"""
+    anticuerpos = int(anticuerpos)
+    umbral = float(umbral)
+    
+    if not 5 <= anticuerpos <= 50:
+        raise ValueError("Anticuerpos debe estar entre 5 y 50")
+        
+    if not 0.1 <= umbral <= 0.9:
+        raise ValueError("Umbral debe estar entre 0.1 y 0.9")
+
+    for estado in sistema_inmune_pasos(anticuerpos, umbral, seed):
+        # 'detecciones' crece con el repertorio: la curva de convergencia es la afinidad
+        yield {**estado, 'mejor': estado['mejor_afinidad']}
+    
+    return [
+        ("success", "Anomalías detectadas", estado['detecciones']),
+        ("success", "Población Final", estado['poblacion']),
+    ]
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("error|Uso: python algoritmo_inmune.py <anticuerpos> <umbral>")
+    binario = "--binario" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--binario"]
+    if len(args) != 2:
+        print("error|Uso: python algoritmo_inmune.py <anticuerpos> <umbral> [--binario]")
         sys.exit(1)
 
     try:
-        anticuerpos = int(sys.argv[1])
-        umbral = float(sys.argv[2])
-        
-        if not 5 <= anticuerpos <= 50:
-            print("error|Anticuerpos debe estar entre 5 y 50")
-            sys.exit(1)
-            
-        if not 0.1 <= umbral <= 0.9:
-            print("error|Umbral debe estar entre 0.1 y 0.9")
-            sys.exit(1)
-
-        resultados = sistema_inmune_artificial(anticuerpos, umbral)
-        
-        # Formato para Streamlit (pipe-separated)
-        print(f"Anomalías detectadas {resultados['detectadas']}")
-        print(f"Población Final {resultados['poblacion_final']}")
+        # Formato para Streamlit (pipe-separated o marcos binarios)
+        protocolo.imprimir(ejecutar(*args), binario)
         
     except Exception as e:
-        print(f"error|{str(e)}")
-        sys.exit(1)
\ No newline at end of file
+        protocolo.imprimir([("error", "Error", str(e))], binario)
+        sys.exit(1)
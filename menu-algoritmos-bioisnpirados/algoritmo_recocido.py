@@ -1,58 +1,108 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import random
 import math
 import sys
+import time
 import io
 import base64
+from functools import lru_cache
+
+import protocolo
+from instrumentacion import NULA
 
 def objective_function(x, y):
     """Función objetivo con múltiples mínimos locales"""
     return (np.sin(0.5 * x) ** 2 + np.cos(0.3 * y) + 0.1 * (x ** 2 + y ** 2) ** 0.5)
 
-def run_simulated_annealing(hilo=1.0, puntos=100):
+def objective_vector(puntos):
+    """objective_function sobre una matriz (n, 2) de puntos"""
+    return objective_function(puntos[:, 0], puntos[:, 1])
+
+def run_simulated_annealing(tamaño=1.0, iteraciones=100, seed=None, instrumentacion=None):
     """Algoritmo principal adaptado para Streamlit"""
+    for estado in run_simulated_annealing_steps(tamaño, iteraciones, seed, instrumentacion):
+        pass
+    return estado['mejor_solucion'], estado['mejor']
+
+def run_simulated_annealing_steps(tamaño=1.0, iteraciones=100, seed=None, instrumentacion=None):
+    """Igual que run_simulated_annealing, pero produce el estado tras cada iteración"""
+    inst = instrumentacion or NULA
     # Configuración fija para simplificar
     temp_inicial = 1000
     temp_final = 1
     enfriamiento = 0.95
     
     # Inicialización
-    current_x = random.uniform(-10, 10)
-    current_y = random.uniform(-10, 10)
+    rng = random.Random(seed)
+    current_x = rng.uniform(-10, 10)
+    current_y = rng.uniform(-10, 10)
     current_temp = temp_inicial
     
     best_solution = (current_x, current_y)
     best_value = objective_function(current_x, current_y)
-    
-    # Preparar gráfico
-    fig, ax = plt.subplots(figsize=(10, 8))
-    x = np.linspace(-10, 10, 100)
-    y = np.linspace(-10, 10, 100)
-    X, Y = np.meshgrid(x, y)
-    Z = objective_function(X, Y)
+    inst.contar('evaluaciones')
+    current_value = best_value
+    yield {
+        'iteracion': 0,
+        'mejor': best_value,
+        'mejor_solucion': best_solution,
+        'actual': current_value,
+        'temperatura': current_temp,
+    }
     
     # Proceso de recocido
     for i in range(iteraciones):
         # Generar nueva solución
-        new_x = current_x + random.uniform(-tamaño, tamaño)
-        new_y = current_y + random.uniform(-tamaño, tamaño)
+        new_x = current_x + rng.uniform(-tamaño, tamaño)
+        new_y = current_y + rng.uniform(-tamaño, tamaño)
         
-        # Evaluar solución
-        current_value = objective_function(current_x, current_y)
-        new_value = objective_function(new_x, new_y)
+        # Evaluar solución (el valor actual ya se conoce)
+        with inst.fase('evaluacion'):
+            new_value = objective_function(new_x, new_y)
+        inst.contar('evaluaciones')
         
         # Criterio de aceptación
-        if new_value < current_value or random.random() < math.exp(-(new_value - current_value) / current_temp):
+        if new_value < current_value or rng.random() < math.exp(-(new_value - current_value) / current_temp):
+            inst.contar('aceptadas')
             current_x, current_y = new_x, new_y
+            current_value = new_value
             if new_value < best_value:
                 best_solution = (new_x, new_y)
                 best_value = new_value
         
         # Enfriar
         current_temp *= enfriamiento
-    
-    # Generar imagen final
+
+        estado = {
+            'iteracion': i + 1,
+            'mejor': best_value,
+            'mejor_solucion': best_solution,
+            'actual': current_value,
+            'temperatura': current_temp,
+        }
+        inst.notificar(estado)
+        yield estado
+
+@lru_cache(maxsize=1)
+def objective_surface(resolucion=100):
+    """Malla de objective_function en [-10, 10]²; se calcula una sola vez por proceso"""
+    x = np.linspace(-10, 10, resolucion)
+    y = np.linspace(-10, 10, resolucion)
+    X, Y = np.meshgrid(x, y)
+    return X, Y, objective_function(X, Y)
+
+def plot_solution(best_solution, best_value):
+    """Dibuja la mejor solución sobre la superficie objetivo y la devuelve como PNG en base64"""
+    return base64.b64encode(render_solution(best_solution, best_value)).decode('utf-8')
+
+def render_solution(best_solution, best_value):
+    """Dibuja la mejor solución sobre la superficie objetivo y la devuelve como bytes PNG"""
+    # matplotlib solo se importa si de verdad se pide un gráfico
+    from matplotlib.figure import Figure
+
+    X, Y, Z = objective_surface()
+    fig = Figure(figsize=(10, 8))
+    ax = fig.subplots()
     ax.contourf(X, Y, Z, levels=20, cmap='viridis')
     ax.scatter(best_solution[0], best_solution[1], c='yellow', s=100, 
                edgecolors='black', label=f'Mejor solución: {best_value:.4f}')
@@ -61,29 +111,201 @@ def run_simulated_annealing(hilo=1.0, puntos=100):
     ax.set_title('Resultado Final - Recocido Simulado')
     ax.legend()
     
-    # Convertir a base64
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode('utf-8')
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    return buf.getvalue()
+
+def run_simulated_annealing_batched(tamaño, iteraciones, n_cadenas=16, tempering=False,
+                                    intervalo_intercambio=10, seed=None, instrumentacion=None):
+    """
+    Avanza `n_cadenas` cadenas independientes a la vez como arrays de NumPy:
+    una sola llamada a objective_function por paso para todas las cadenas.
+
+    Con `tempering` cada cadena tiene una temperatura fija de una escala
+    geométrica entre temp_inicial y temp_final, y cada `intervalo_intercambio`
+    pasos las cadenas vecinas intercambian estados (parallel tempering).
+    Devuelve la mejor solución y su valor entre todas las cadenas.
+    """
+    inst = instrumentacion or NULA
+    temp_inicial = 1000
+    temp_final = 1
+    enfriamiento = 0.95
+    rng = np.random.default_rng(seed)
+
+    posiciones = rng.uniform(-10, 10, (n_cadenas, 2))
+    valores = objective_function(posiciones[:, 0], posiciones[:, 1])
+    if tempering:
+        temperaturas = temp_inicial * (temp_final / temp_inicial) ** np.linspace(0, 1, n_cadenas)
+    else:
+        temperaturas = np.full(n_cadenas, float(temp_inicial))
+
+    mejor = int(np.argmin(valores))
+    best_solution = tuple(posiciones[mejor])
+    best_value = float(valores[mejor])
+
+    for i in range(iteraciones):
+        nuevas = posiciones + rng.uniform(-tamaño, tamaño, posiciones.shape)
+        with inst.fase('evaluacion'):
+            nuevos_valores = objective_function(nuevas[:, 0], nuevas[:, 1])
+        inst.contar('evaluaciones', n_cadenas)
+
+        # Criterio de aceptación de Metropolis para todas las cadenas
+        delta = nuevos_valores - valores
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            aceptar = (delta < 0) | (rng.random(n_cadenas) < np.exp(-delta / temperaturas))
+        posiciones[aceptar] = nuevas[aceptar]
+        valores[aceptar] = nuevos_valores[aceptar]
+        inst.contar('aceptadas', int(aceptar.sum()))
+
+        mejor = int(np.argmin(valores))
+        if valores[mejor] < best_value:
+            best_solution = tuple(posiciones[mejor])
+            best_value = float(valores[mejor])
+
+        if tempering:
+            if (i + 1) % intervalo_intercambio == 0 and n_cadenas > 1:
+                # Pares vecinos alternando (0,1),(2,3)... y (1,2),(3,4)...
+                a = np.arange((i // intervalo_intercambio) % 2, n_cadenas - 1, 2)
+                b = a + 1
+                with np.errstate(over='ignore'):
+                    prob = np.exp((1 / temperaturas[a] - 1 / temperaturas[b]) * (valores[a] - valores[b]))
+                swap = rng.random(len(a)) < prob
+                inst.contar('intercambios', int(swap.sum()))
+                a, b = a[swap], b[swap]
+                posiciones[a], posiciones[b] = posiciones[b].copy(), posiciones[a].copy()
+                valores[a], valores[b] = valores[b].copy(), valores[a].copy()
+        else:
+            temperaturas *= enfriamiento
+        inst.notificar({'iteracion': i + 1, 'mejor': best_value})
+
+    return (float(best_solution[0]), float(best_solution[1])), best_value
+
+SCHEDULES = ('geometric', 'logarithmic', 'adaptive')
+
+def simulated_annealing(objective, bounds, tamaño=1.0, n_cadenas=1, schedule='geometric',
+                        temp_inicial=1000.0, enfriamiento=0.95, temp_minima=1e-8,
+                        max_evaluaciones=None, max_iteraciones=None, time_limit=None,
+                        stagnation_limit=None, reheat_after=None, seed=None, instrumentacion=None):
+    """
+    Recocido simulado genérico en n dimensiones.
+
+    `objective` recibe una matriz (n_cadenas, d) y devuelve un vector de valores;
+    `bounds` es una secuencia de pares (mínimo, máximo) por dimensión. Esquemas
+    de enfriamiento:
+    - 'geometric': T = T0 · enfriamiento^k
+    - 'logarithmic': T = T0 · ln 2 / ln(k + 2), que en k = 0 vale T0
+    - 'adaptive': enfría si se aceptan muchos movimientos y calienta si casi
+      ninguno; tras `reheat_after` iteraciones sin mejorar vuelve a T0
+    Se detiene al agotar evaluaciones, iteraciones, `time_limit` segundos,
+    `stagnation_limit` iteraciones sin mejorar o al bajar de `temp_minima`
+    (salvo en 'adaptive'). Devuelve (mejor punto, mejor valor, info).
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Esquema de enfriamiento desconocido: {schedule}")
+    if max_evaluaciones is None and max_iteraciones is None and time_limit is None \
+            and stagnation_limit is None:
+        raise ValueError("Indica al menos un criterio de parada")
+    inst = instrumentacion or NULA
+    rng = np.random.default_rng(seed)
+    bounds = np.asarray(bounds, dtype=float)
+    inferior, superior = bounds[:, 0], bounds[:, 1]
+    paso = tamaño * np.ones(len(bounds))
+
+    inicio = time.monotonic()
+    posiciones = rng.uniform(inferior, superior, (n_cadenas, len(bounds)))
+    valores = np.asarray(objective(posiciones), dtype=float)
+    evaluaciones = n_cadenas
+    temp = float(temp_inicial)
+
+    mejor = int(np.argmin(valores))
+    best_x, best_value = posiciones[mejor].copy(), float(valores[mejor])
+    sin_mejora = 0
+    k = 0
+    motivo = None
+
+    while motivo is None:
+        if max_iteraciones is not None and k >= max_iteraciones:
+            motivo = 'iteraciones'
+        elif max_evaluaciones is not None and evaluaciones + n_cadenas > max_evaluaciones:
+            motivo = 'evaluaciones'
+        elif time_limit is not None and time.monotonic() - inicio >= time_limit:
+            motivo = 'tiempo'
+        elif stagnation_limit is not None and sin_mejora >= stagnation_limit:
+            motivo = 'estancamiento'
+        elif schedule != 'adaptive' and temp < temp_minima:
+            motivo = 'temperatura'
+        if motivo is not None:
+            break
+
+        nuevas = np.clip(posiciones + rng.uniform(-paso, paso, posiciones.shape), inferior, superior)
+        with inst.fase('evaluacion'):
+            nuevos_valores = np.asarray(objective(nuevas), dtype=float)
+        evaluaciones += n_cadenas
+        inst.contar('evaluaciones', n_cadenas)
+
+        delta = nuevos_valores - valores
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            aceptar = (delta < 0) | (rng.random(n_cadenas) < np.exp(-delta / temp))
+        posiciones[aceptar] = nuevas[aceptar]
+        valores[aceptar] = nuevos_valores[aceptar]
+        inst.contar('aceptadas', int(aceptar.sum()))
+
+        mejor = int(np.argmin(valores))
+        if valores[mejor] < best_value:
+            best_x, best_value = posiciones[mejor].copy(), float(valores[mejor])
+            sin_mejora = 0
+        else:
+            sin_mejora += 1
+
+        k += 1
+        if schedule == 'geometric':
+            temp = temp_inicial * enfriamiento ** k
+        elif schedule == 'logarithmic':
+            temp = temp_inicial * math.log(2) / math.log(k + 2)
+        else:
+            tasa = aceptar.mean()
+            temp = temp * enfriamiento if tasa > 0.2 else temp / enfriamiento
+            temp = max(temp, temp_minima)
+            if reheat_after is not None and sin_mejora and sin_mejora % reheat_after == 0:
+                temp = float(temp_inicial)
+        inst.notificar({'iteracion': k, 'mejor': best_value, 'temperatura': temp})
+
+    info = {'evaluaciones': evaluaciones, 'iteraciones': k, 'temperatura': temp,
+            'motivo': motivo, 'tiempo': time.monotonic() - inicio}
+    return best_x, best_value, info
+
+def ejecutar(tamaño, iteraciones, seed=None, imagen=True):
+    """Punto de entrada para el menú: devuelve las salidas como (tipo, clave, valor)"""
+    return protocolo.consumir(ejecutar_por_pasos(tamaño, iteraciones, seed, imagen))
+
+def ejecutar_por_pasos(tamaño, iteraciones, seed=None, imagen=True):
+    """Como ejecutar, pero produce el estado de cada iteración y devuelve las salidas al terminar.
+    Con imagen=False no se dibuja la gráfica (barridos de parámetros)."""
+    tamaño = float(tamaño)
+    iteraciones = int(iteraciones)
+    
+    for estado in run_simulated_annealing_steps(tamaño, iteraciones, seed):
+        yield estado
+    best_sol, best_val = estado['mejor_solucion'], estado['mejor']
     
-    return best_solution, best_value, img_str
+    resultados = [
+        ("success", "Mejor solución", f"X={best_sol[0]:.4f}, Y={best_sol[1]:.4f}"),
+        ("success", "Valor mínimo", round(float(best_val), 4)),
+    ]
+    if imagen:
+        resultados.append(("image", "Visualización", render_solution(best_sol, best_val)))
+    return resultados
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("error|Uso: python algoritmo_recocido.py <tamaño> <iteraciones>")
+    binario = "--binario" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--binario"]
+    if len(args) != 2:
+        print("error|Uso: python algoritmo_recocido.py <tamaño> <iteraciones> [--binario]")
         sys.exit(1)
     
     try:
-        tamaño = float(sys.argv[1])
-        iteraciones = int(sys.argv[2])
-        
-        best_sol, best_val, img_str = run_simulated_annealing(tamaño, iteraciones)
-        
-        print(f"Mejor solución X={best_sol[0]:.4f}, Y={best_sol[1]:.4f}")
-        print(f"Valor mínimo {best_val:.4f}")
-        print(f"image|Visualización |{img_str}")
+        protocolo.imprimir(ejecutar(*args), binario)
         
     except Exception as e:
-        print(f"error|{str(e)}")
\ No newline at end of file
+        protocolo.imprimir([("error", "Error", str(e))], binario)
+        sys.exit(1)
@@ -0,0 +1,238 @@
+"""
+Barridos de parámetros para ajustar los algoritmos sin pasar por el menú.
+
+Una configuración es un diccionario con los parámetros del algoritmo (los
+mismos nombres que en el menú); `rejilla` genera todas las combinaciones de
+unas listas de valores y `aleatorio` sortea configuraciones dentro de unos
+rangos. Cada configuración se ejecuta con varias semillas en un grupo de
+procesos con los algoritmos ya importados.
+
+Los resultados se guardan por columnas (parámetros, semilla, tiempo y las
+métricas numéricas del último estado del algoritmo) en archivos .npz dentro
+de un directorio, un archivo por lote. Así un barrido interrumpido conserva
+lo ya calculado y al relanzarlo solo se ejecuta lo que falta.
+
+Uso:
+    python barrido.py algoritmo_hormiguero.py resultados/ --rejilla hormigas=5,10,20 iteraciones=50,100 --repeticiones 5
+    python barrido.py algoritmo_genetico.py resultados/ --aleatorio 200 --rangos poblacion=10:200 mutacion=0.01:0.5
+"""
+import argparse
+import inspect
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import ejecutor
+
+# Parámetros de ejecutar() de cada algoritmo, en orden, con su tipo
+ESPACIOS = {
+    "algoritmo_genetico.py": {"poblacion": int, "mutacion": float},
+    "algoritmo_inmune.py": {"anticuerpos": int, "umbral": float},
+    "algoritmo_hormiguero.py": {"hormigas": int, "iteraciones": int},
+    "algoritmo_recocido.py": {"tamaño": float, "iteraciones": int},
+}
+
+def _espacio(archivo):
+    if archivo not in ESPACIOS:
+        raise ValueError(f"Algoritmo desconocido: {archivo}")
+    return ESPACIOS[archivo]
+
+def rejilla(archivo, **valores):
+    """Todas las combinaciones de los valores dados para cada parámetro"""
+    espacio = _espacio(archivo)
+    if set(valores) != set(espacio):
+        raise ValueError(f"Parámetros esperados: {', '.join(espacio)}")
+    listas = [[tipo(v) for v in valores[nombre]] for nombre, tipo in espacio.items()]
+    return [dict(zip(espacio, combinacion)) for combinacion in itertools.product(*listas)]
+
+def aleatorio(archivo, n, seed=None, **rangos):
+    """n configuraciones sorteadas uniformemente en los rangos (mínimo, máximo) de cada parámetro"""
+    espacio = _espacio(archivo)
+    if set(rangos) != set(espacio):
+        raise ValueError(f"Parámetros esperados: {', '.join(espacio)}")
+    rng = np.random.default_rng(seed)
+    columnas = {}
+    for nombre, tipo in espacio.items():
+        bajo, alto = rangos[nombre]
+        if tipo is int:
+            columnas[nombre] = rng.integers(int(bajo), int(alto), size=n, endpoint=True).tolist()
+        else:
+            columnas[nombre] = rng.uniform(float(bajo), float(alto), size=n).tolist()
+    return [{nombre: columnas[nombre][i] for nombre in espacio} for i in range(n)]
+
+def _ejecutar_configuracion(archivo, configuracion, seed):
+    """Ejecuta una configuración y devuelve una fila: parámetros, semilla, tiempo y métricas"""
+    fila = {**configuracion, "seed": seed}
+    modulo = ejecutor.cargar(archivo)
+    opciones = {"imagen": False} if "imagen" in inspect.signature(modulo.ejecutar_por_pasos).parameters else {}
+    inicio = time.perf_counter()
+    try:
+        estado = {}
+        pasos = modulo.ejecutar_por_pasos(*configuracion.values(), seed=seed, **opciones)
+        for estado in pasos:
+            pass
+    except Exception as e:
+        fila["error"] = str(e)
+    else:
+        fila["error"] = ""
+        # Solo las métricas numéricas del último estado (mejor, iteraciones, diversidad...)
+        for clave, valor in estado.items():
+            if isinstance(valor, (bool, np.bool_)):
+                continue
+            if isinstance(valor, (int, float, np.integer, np.floating)):
+                fila[clave] = float(valor)
+    fila["tiempo"] = time.perf_counter() - inicio
+    return fila
+
+def _a_columnas(filas):
+    columnas = {}
+    for nombre in dict.fromkeys(k for fila in filas for k in fila):
+        valores = [fila.get(nombre) for fila in filas]
+        if all(isinstance(v, str) for v in valores):
+            columnas[nombre] = np.array(valores, dtype=str)
+        else:
+            # Las filas con error no tienen métricas: NaN
+            columnas[nombre] = np.array([np.nan if v is None else v for v in valores], dtype=float)
+    return columnas
+
+def _guardar_lote(directorio, filas):
+    nombre = f"lote_{time.time_ns()}_{os.getpid()}"
+    temporal = os.path.join(directorio, nombre + ".tmp")
+    with open(temporal, "wb") as f:
+        np.savez(f, **_a_columnas(filas))
+    # Escritura atómica: un lote a medias nunca queda con extensión .npz
+    os.replace(temporal, os.path.join(directorio, nombre + ".npz"))
+
+def cargar_resultados(directorio):
+    """
+    Une los lotes de un barrido en un diccionario columna -> array. Si un par
+    (configuración, semilla) se ejecutó varias veces (reintentos tras un error)
+    solo queda su fila más reciente.
+    """
+    lotes = []
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith(".npz"):
+            with np.load(os.path.join(directorio, nombre)) as datos:
+                lotes.append({k: datos[k] for k in datos.files})
+    nombres = list(dict.fromkeys(k for lote in lotes for k in lote))
+    columnas = {}
+    for nombre in nombres:
+        partes = []
+        for lote in lotes:
+            n = len(next(iter(lote.values())))
+            if nombre in lote:
+                partes.append(lote[nombre])
+            elif nombre == "error":
+                partes.append(np.full(n, "", dtype=str))
+            else:
+                partes.append(np.full(n, np.nan))
+        columnas[nombre] = np.concatenate(partes)
+    if "seed" not in columnas:
+        return columnas
+
+    # Los lotes van en orden cronológico y los parámetros son las columnas
+    # anteriores a la semilla (ver _ejecutar_configuracion)
+    claves = zip(*(columnas[nombre] for nombre in nombres[:nombres.index("seed") + 1]))
+    ultima = {clave: i for i, clave in enumerate(claves)}
+    indices = np.sort(np.fromiter(ultima.values(), dtype=np.intp, count=len(ultima)))
+    return {nombre: valores[indices] for nombre, valores in columnas.items()}
+
+def _hechas(directorio, espacio):
+    """Pares (configuración, semilla) cuya última ejecución no dio error; los fallidos se reintentan"""
+    if not any(nombre.endswith(".npz") for nombre in os.listdir(directorio)):
+        return set()
+    columnas = cargar_resultados(directorio)
+    correctas = columnas["error"] == ""
+    filas = zip(*(columnas[nombre][correctas] for nombre in espacio), columnas["seed"][correctas])
+    return {tuple(float(v) for v in fila) for fila in filas}
+
+def barrer(archivo, configuraciones, semillas, directorio, workers=None, lote=50, intervalo=30.0, progreso=None):
+    """
+    Ejecuta cada configuración con cada semilla y va guardando los resultados
+    en `directorio`. Se salta lo que ya esté guardado sin error, así que
+    relanzar el mismo barrido lo continúa y reintenta lo que falló (al cargar
+    los resultados cada reintento sustituye a su fila anterior). Devuelve el
+    número de ejecuciones nuevas.
+    """
+    espacio = _espacio(archivo)
+    os.makedirs(directorio, exist_ok=True)
+    hechas = _hechas(directorio, espacio)
+    pendientes = [
+        (configuracion, seed)
+        for configuracion in configuraciones
+        for seed in semillas
+        if tuple(float(configuracion[n]) for n in espacio) + (float(seed),) not in hechas
+    ]
+    if not pendientes:
+        return 0
+
+    filas = []
+    ultimo_guardado = time.monotonic()
+    completadas = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=ejecutor.precargar) as pool:
+        futuros = [pool.submit(_ejecutar_configuracion, archivo, c, s) for c, s in pendientes]
+        try:
+            for futuro in as_completed(futuros):
+                filas.append(futuro.result())
+                completadas += 1
+                if progreso is not None:
+                    progreso(completadas, len(pendientes))
+                if len(filas) >= lote or time.monotonic() - ultimo_guardado > intervalo:
+                    _guardar_lote(directorio, filas)
+                    filas = []
+                    ultimo_guardado = time.monotonic()
+        finally:
+            # También al interrumpir (Ctrl+C): lo calculado no se pierde
+            for futuro in futuros:
+                futuro.cancel()
+            if filas:
+                _guardar_lote(directorio, filas)
+    return completadas
+
+def _parsear(espacio, especificaciones, separador):
+    valores = {}
+    for especificacion in especificaciones:
+        nombre, _, texto = especificacion.partition("=")
+        if nombre not in espacio or not texto:
+            raise ValueError(f"Parámetro no válido: {especificacion} (esperados: {', '.join(espacio)})")
+        valores[nombre] = texto.split(separador)
+    return valores
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de un algoritmo")
+    parser.add_argument("archivo", choices=list(ESPACIOS))
+    parser.add_argument("directorio", help="Directorio donde se guardan los lotes .npz")
+    modo = parser.add_mutually_exclusive_group(required=True)
+    modo.add_argument("--rejilla", nargs="+", metavar="PARAM=V1,V2,...")
+    modo.add_argument("--aleatorio", type=int, metavar="N", help="N configuraciones aleatorias")
+    parser.add_argument("--rangos", nargs="+", default=[], metavar="PARAM=MIN:MAX")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Semillas por configuración")
+    parser.add_argument("--semilla-inicial", type=int, default=1)
+    parser.add_argument("--semilla-barrido", type=int, default=None, help="Semilla del sorteo de configuraciones")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--lote", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        espacio = ESPACIOS[args.archivo]
+        if args.rejilla:
+            configuraciones = rejilla(args.archivo, **_parsear(espacio, args.rejilla, ","))
+        else:
+            rangos = _parsear(espacio, args.rangos, ":")
+            configuraciones = aleatorio(args.archivo, args.aleatorio, args.semilla_barrido, **rangos)
+        semillas = range(args.semilla_inicial, args.semilla_inicial + args.repeticiones)
+
+        def mostrar(hechas, total):
+            print(f"\r{hechas}/{total}", end="", file=sys.stderr, flush=True)
+
+        nuevas = barrer(args.archivo, configuraciones, semillas, args.directorio,
+                        workers=args.workers, lote=args.lote, progreso=mostrar)
+        print(f"\n{nuevas} ejecuciones nuevas en {args.directorio}", file=sys.stderr)
+    except (ValueError, KeyboardInterrupt) as e:
+        print(f"error|{e}" if isinstance(e, ValueError) else "\nInterrumpido: los lotes guardados se conservan",
+              file=sys.stderr)
+        sys.exit(1)
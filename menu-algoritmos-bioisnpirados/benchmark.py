@@ -0,0 +1,234 @@
+"""
+Benchmarks de los cuatro algoritmos con cargas reproducibles y crecientes.
+
+Cada caso se ejecuta con una semilla fija a varias escalas (ciudades,
+población, longitud del genoma, anticuerpos, iteraciones) y se registra:
+- tiempo: mediana y mínimo de varias repeticiones sin instrumentar
+- memoria: pico de tracemalloc en una ejecución aparte (tracemalloc ralentiza)
+- calidad: la métrica de la solución del caso (y si es mejor mayor o menor)
+- fases y contadores de `instrumentacion` en otra ejecución aparte
+
+Con --comparar se contrasta con un JSON anterior y se marcan las regresiones
+de tiempo (por encima de la tolerancia) y de calidad; el código de salida es 1
+si hay alguna.
+
+Uso:
+    python benchmark.py --salida base.json
+    python benchmark.py --algoritmo hormiguero --comparar base.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import algoritmo_genetico
+import algoritmo_hormiguero
+import algoritmo_inmune
+import algoritmo_recocido
+from instrumentacion import Instrumentacion
+
+def _ciudades(n, seed):
+    ciudades = np.random.default_rng(seed).random((n, 2)) * 100
+    return np.linalg.norm(ciudades[:, None, :] - ciudades[None, :, :], axis=-1)
+
+def acs_disperso(n, seed, inst):
+    ciudades = np.random.default_rng(seed).random((n, 2)) * 100
+    acs = algoritmo_hormiguero.SparseAntColonySystem(ciudades, n_neighbors=10, n_ants=10, iterations=10,
+                                                     seed=seed, instrumentacion=inst)
+    return acs.run()[1]
+
+def acs_islas(n, seed, inst):
+    # Las colonias corren en otros procesos: sin instrumentación ni memoria de los hijos
+    return algoritmo_hormiguero.run_islands(_ciudades(n, seed), n_islands=2, iterations=20,
+                                            migration_interval=5, seed=seed, n_ants=10, batched=True)[1]
+
+def acs_bucle(n, seed, inst):
+    acs = algoritmo_hormiguero.AntColonySystem(_ciudades(n, seed), n_ants=10, iterations=10,
+                                               seed=seed, instrumentacion=inst)
+    return acs.run()[1]
+
+def acs_por_lotes(n, seed, inst):
+    acs = algoritmo_hormiguero.AntColonySystem(_ciudades(n, seed), n_ants=20, iterations=20, batched=True,
+                                               local_search="best", seed=seed, instrumentacion=inst)
+    return acs.run()[1]
+
+def acs_duplicadas(n, seed, inst):
+    # Cuadrado unidad con una ciudad repetida: la feromona supera n_cities y η es muy alto
+    ciudades = np.random.default_rng(seed).random((n, 2))
+    ciudades = np.vstack([ciudades, ciudades[:1]])
+    distancias = np.linalg.norm(ciudades[:, None, :] - ciudades[None, :, :], axis=-1)
+    acs = algoritmo_hormiguero.AntColonySystem(distancias, n_ants=10, iterations=100, batched=True,
+                                               seed=seed, instrumentacion=inst)
+    return acs.run()[1]
+
+def genetico(poblacion, seed, inst):
+    # Generaciones hasta encontrar TARGET (o MAX_GENERATIONS)
+    for estado in algoritmo_genetico.genetic_algorithm_steps(
+            poblacion, 0.1, max_generations=algoritmo_genetico.MAX_GENERATIONS, seed=seed, instrumentacion=inst):
+        pass
+    return estado["generacion"]
+
+def genetico_empaquetado(longitud, seed, inst):
+    # Fracción de bits acertados tras 100 generaciones
+    objetivo = "".join(np.random.default_rng(seed).choice(["0", "1"], longitud))
+    _, mejor = algoritmo_genetico.genetic_algorithm_packed(200, 1 / longitud, target=objetivo,
+                                                         max_generations=100, seed=seed, instrumentacion=inst)
+    return sum(a == b for a, b in zip(mejor, objetivo)) / longitud
+
+# Las versiones de entrenamiento no clasifican cada antígeno: su cuenta de "detecciones"
+# (pares anticuerpo/antígeno bajo el umbral) crece con el repertorio y no mide calidad.
+# Solo se miden tiempo y memoria; la calidad de detección la da inmune_stream
+def inmune(anticuerpos, seed, inst):
+    for _ in algoritmo_inmune.sistema_inmune_pasos(anticuerpos, 0.5, seed, instrumentacion=inst):
+        pass
+
+def inmune_vectorizado(anticuerpos, seed, inst):
+    algoritmo_inmune.sistema_inmune_vectorizado(anticuerpos, 0.5, seed, max_repertorio=4 * anticuerpos,
+                                                instrumentacion=inst)
+
+def recocido(iteraciones, seed, inst):
+    for estado in algoritmo_recocido.run_simulated_annealing_steps(1.0, iteraciones, seed, instrumentacion=inst):
+        pass
+    return estado["mejor"]
+
+def recocido_por_lotes(n_cadenas, seed, inst):
+    return algoritmo_recocido.run_simulated_annealing_batched(1.0, 500, n_cadenas, tempering=True,
+                                                              seed=seed, instrumentacion=inst)[1]
+
+def _rastrigin(x):
+    return 10 * x.shape[1] + (x ** 2 - 10 * np.cos(2 * np.pi * x)).sum(axis=1)
+
+def recocido_n_dimensional(dimensiones, seed, inst):
+    # Rastrigin en [-5.12, 5.12]^d, mínimo 0 en el origen
+    _, valor, _ = algoritmo_recocido.simulated_annealing(
+        _rastrigin, [(-5.12, 5.12)] * dimensiones, tamaño=0.5, n_cadenas=16, schedule='adaptive',
+        max_iteraciones=500, seed=seed, instrumentacion=inst)
+    return valor
+
+def inmune_stream(n_registros, seed, inst):
+    # Repertorio de 200 anticuerpos "propios" de 32 bits; el flujo trae copias con un bit
+    # cambiado y un 10% de anomalías aleatorias. Calidad: fracción de anomalías marcadas
+    longitud = 32
+    rng = np.random.default_rng(seed)
+    propios = rng.integers(0, 2, (200, longitud), dtype=np.uint8)
+    repertorio = algoritmo_inmune.Repertorio(np.packbits(propios, axis=1), longitud)
+    registros = propios[rng.integers(0, len(propios), n_registros)]
+    registros[np.arange(n_registros), rng.integers(0, longitud, n_registros)] ^= 1
+    es_anomalia = rng.random(n_registros) < 0.1
+    registros[es_anomalia] = rng.integers(0, 2, (int(es_anomalia.sum()), longitud), dtype=np.uint8)
+    marcadas = np.fromiter(
+        (anomalia for anomalia, _ in algoritmo_inmune.detectar_stream(
+            repertorio, np.packbits(registros, axis=1), 0.8, tam_lote=1024, actualizar=True,
+            max_repertorio=400, seed=seed, instrumentacion=inst)),
+        dtype=bool, count=n_registros)
+    return marcadas[es_anomalia].mean()
+
+# (algoritmo, caso, función(escala, seed, instrumentacion) -> calidad, escalas, mejor calidad)
+# Sin calidad (None) el caso no entra en la comparación de calidad
+CASOS = [
+    ("hormiguero", "bucle", acs_bucle, [15, 30, 60], "menor"),
+    ("hormiguero", "por_lotes", acs_por_lotes, [15, 50, 150], "menor"),
+    ("hormiguero", "duplicadas", acs_duplicadas, [14, 50, 150], "menor"),
+    ("hormiguero", "disperso", acs_disperso, [50, 200, 1000], "menor"),
+    ("hormiguero", "islas", acs_islas, [15, 50, 150], "menor"),
+    ("genetico", "cadenas", genetico, [10, 50, 200], "menor"),
+    ("genetico", "empaquetado", genetico_empaquetado, [64, 256, 1024], "mayor"),
+    ("inmune", "bucle", inmune, [5, 20, 50], None),
+    ("inmune", "vectorizado", inmune_vectorizado, [50, 200, 500], None),
+    ("inmune", "stream", inmune_stream, [1000, 10000, 100000], "mayor"),
+    ("recocido", "pasos", recocido, [100, 1000, 10000], "menor"),
+    ("recocido", "por_lotes", recocido_por_lotes, [16, 128, 1024], "menor"),
+    ("recocido", "n_dimensional", recocido_n_dimensional, [2, 10, 50], "menor"),
+]
+
+def medir(funcion, escala, seed, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        calidad = funcion(escala, seed, None)
+        tiempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcion(escala, seed, None)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    inst = Instrumentacion()
+    funcion(escala, seed, inst)
+    return {
+        "tiempo_mediana": statistics.median(tiempos),
+        "tiempo_min": min(tiempos),
+        "memoria_pico": pico,
+        "calidad": None if calidad is None else float(calidad),
+        "instrumentacion": inst.resumen(),
+    }
+
+def ejecutar_benchmarks(algoritmos=None, seed=1, repeticiones=3, rapido=False, progreso=None):
+    resultados = []
+    for algoritmo, caso, funcion, escalas, sentido in CASOS:
+        if algoritmos and algoritmo not in algoritmos:
+            continue
+        for escala in escalas[:1] if rapido else escalas:
+            registro = {"algoritmo": algoritmo, "caso": caso, "escala": escala, "seed": seed,
+                        "sentido_calidad": sentido, **medir(funcion, escala, seed, repeticiones)}
+            resultados.append(registro)
+            if progreso is not None:
+                progreso(registro)
+    return resultados
+
+def comparar(actuales, base, tolerancia=0.25, margen=0.005):
+    """
+    Regresiones respecto a `base`: tiempo por encima de la tolerancia relativa
+    (y de `margen` segundos, para no marcar el ruido de los casos pequeños) o calidad peor
+    """
+    indice = {(r["algoritmo"], r["caso"], r["escala"], r["seed"]): r for r in base}
+    regresiones = []
+    for r in actuales:
+        anterior = indice.get((r["algoritmo"], r["caso"], r["escala"], r["seed"]))
+        if anterior is None:
+            continue
+        nombre = f"{r['algoritmo']}/{r['caso']}/{r['escala']}"
+        limite = max(anterior["tiempo_mediana"] * (1 + tolerancia), anterior["tiempo_mediana"] + margen)
+        if r["tiempo_mediana"] > limite:
+            regresiones.append(f"{nombre}: tiempo {anterior['tiempo_mediana']:.4f}s -> {r['tiempo_mediana']:.4f}s")
+        if r["sentido_calidad"] is None or r["calidad"] is None or anterior["calidad"] is None:
+            continue
+        peor = r["calidad"] > anterior["calidad"] if r["sentido_calidad"] == "menor" else r["calidad"] < anterior["calidad"]
+        if peor:
+            regresiones.append(f"{nombre}: calidad {anterior['calidad']:.4g} -> {r['calidad']:.4g}")
+    return regresiones
+
+def _mostrar(r):
+    fases = sorted(r["instrumentacion"]["fases"].items(), key=lambda f: -f[1]["tiempo"])
+    reparto = ", ".join(f"{nombre} {datos['tiempo']:.3f}s" for nombre, datos in fases[:3])
+    calidad = "-" if r["calidad"] is None else f"{r['calidad']:.4g}"
+    print(f"{r['algoritmo']:<11} {r['caso']:<14} {r['escala']:>6}  {r['tiempo_mediana']:8.4f}s  "
+          f"{r['memoria_pico'] / 1024:9.1f} KiB  calidad {calidad:<10} {reparto}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de los algoritmos bioinspirados")
+    parser.add_argument("--algoritmo", action="append", choices=sorted({c[0] for c in CASOS}))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--rapido", action="store_true", help="Solo la escala más pequeña de cada caso")
+    parser.add_argument("--salida", help="Guarda los resultados en este JSON")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Margen relativo de tiempo (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resultados = ejecutar_benchmarks(args.algoritmo, args.seed, args.repeticiones, args.rapido, _mostrar)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(resultados, f, indent=2)
+    if args.comparar:
+        with open(args.comparar) as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        sys.exit(1 if regresiones else 0)
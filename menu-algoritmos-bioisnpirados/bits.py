@@ -0,0 +1,13 @@
+"""
+Operaciones sobre matrices de bits empaquetados (uint8) que comparten los
+algoritmos genético e inmune.
+"""
+import numpy as np
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(x):
+    """Número de bits a 1 de cada byte de `x`; usa np.bitwise_count si NumPy lo tiene (>= 2.0)"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return _POPCOUNT_TABLE[x]
@@ -0,0 +1,120 @@
+"""
+Caché de resultados de los algoritmos.
+
+La clave combina el algoritmo, sus parámetros, la semilla y la versión del
+código (hash del archivo del algoritmo), así que un cambio en el algoritmo
+invalida sus resultados anteriores. Solo tiene sentido con semilla: sin ella
+dos ejecuciones iguales dan resultados distintos.
+
+Hay dos niveles: un LRU en memoria y un directorio en disco con los
+resultados serializados con `protocolo`, que se recorta por tamaño borrando
+los menos usados recientemente.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import protocolo
+
+DIRECTORIO_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_resultados")
+
+@lru_cache(maxsize=None)
+def version_codigo(ruta):
+    """Hash del código fuente del algoritmo (y del protocolo con el que se guarda)"""
+    h = hashlib.sha256()
+    for archivo in (ruta, protocolo.__file__):
+        with open(archivo, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def clave(archivo, parametros, seed):
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), archivo)
+    datos = json.dumps([archivo, [str(p) for p in parametros], seed, version_codigo(ruta)])
+    return hashlib.sha256(datos.encode()).hexdigest()
+
+class CacheResultados:
+    def __init__(self, directorio=DIRECTORIO_POR_DEFECTO, max_memoria=128, max_bytes_disco=256 * 1024 * 1024):
+        self.directorio = directorio
+        self.max_memoria = max_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self.hits = 0
+        self.misses = 0
+        self._memoria = OrderedDict()
+        # Las sesiones de Streamlit comparten la caché desde hilos distintos
+        self._lock = threading.RLock()
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, k):
+        return os.path.join(self.directorio, k + ".bin")
+
+    def obtener(self, archivo, parametros, seed):
+        """Resultados guardados para esta ejecución, o None"""
+        if seed is None:
+            return None
+        k = clave(archivo, parametros, seed)
+        with self._lock:
+            if k in self._memoria:
+                self._memoria.move_to_end(k)
+                self.hits += 1
+                return self._memoria[k]
+        if self.directorio is not None:
+            ruta = self._ruta(k)
+            try:
+                with open(ruta, "rb") as f:
+                    resultados = protocolo.decodificar(f.read())
+                # Marca de uso reciente para el desalojo en disco
+                os.utime(ruta)
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                    self._guardar_en_memoria(k, resultados)
+                return resultados
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def guardar(self, archivo, parametros, seed, resultados):
+        if seed is None:
+            return
+        k = clave(archivo, parametros, seed)
+        self._guardar_en_memoria(k, resultados)
+        if self.directorio is not None:
+            # Escritura atómica para que otro proceso o hilo nunca lea un archivo a medias
+            temporal = self._ruta(k) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporal, "wb") as f:
+                f.write(protocolo.codificar(resultados))
+            os.replace(temporal, self._ruta(k))
+            self._recortar_disco()
+
+    def _guardar_en_memoria(self, k, resultados):
+        with self._lock:
+            self._memoria[k] = resultados
+            self._memoria.move_to_end(k)
+            while len(self._memoria) > self.max_memoria:
+                self._memoria.popitem(last=False)
+
+    def _recortar_disco(self):
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith(".bin"):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directorio, nombre))
+            except FileNotFoundError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, nombre))
+        total = sum(tam for _, tam, _ in entradas)
+        for _, tam, nombre in sorted(entradas):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(os.path.join(self.directorio, nombre))
+            except FileNotFoundError:
+                pass
+            total -= tam
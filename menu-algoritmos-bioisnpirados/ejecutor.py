@@ -0,0 +1,113 @@
+"""
+Ejecución de los algoritmos desde el menú sin lanzar un intérprete por petición.
+
+Los cuatro módulos se importan una sola vez y se llama directamente a su
+función `ejecutar`. Si se necesita aislamiento (que un fallo o una fuga de
+memoria no afecte a Streamlit), las peticiones se envían a un grupo de
+procesos que ya tienen los módulos importados.
+
+Con semilla, los resultados se guardan en la caché de `cache_resultados`
+y las peticiones repetidas se responden sin ejecutar nada.
+"""
+import importlib
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import protocolo
+from cache_resultados import CacheResultados, DIRECTORIO_POR_DEFECTO
+
+# Archivo del algoritmo -> módulo con la función ejecutar(param1, param2)
+MODULOS = {
+    "algoritmo_genetico.py": "algoritmo_genetico",
+    "algoritmo_inmune.py": "algoritmo_inmune",
+    "algoritmo_hormiguero.py": "algoritmo_hormiguero",
+    "algoritmo_recocido.py": "algoritmo_recocido",
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+def cargar(archivo):
+    """Devuelve el módulo del algoritmo; Python lo importa solo la primera vez"""
+    if archivo not in MODULOS:
+        raise ValueError(f"Algoritmo desconocido: {archivo}")
+    return importlib.import_module(MODULOS[archivo])
+
+def precargar():
+    """Importa todos los algoritmos (NumPy incluido) de antemano"""
+    for archivo in MODULOS:
+        cargar(archivo)
+
+def contexto_procesos():
+    """
+    Contexto de multiprocessing para crear procesos desde Streamlit, que tiene
+    varios hilos: forkserver con los algoritmos precargados, o spawn si no hay
+    """
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        # Los algoritmos se importan de forma perezosa: hay que precargarlos por nombre
+        ctx.set_forkserver_preload(["ejecutor", *MODULOS.values()])
+        return ctx
+    return mp.get_context("spawn")
+
+def obtener_cache():
+    """Caché de resultados compartida; el directorio se puede cambiar con ALGORITMOS_CACHE"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheResultados(os.environ.get("ALGORITMOS_CACHE", DIRECTORIO_POR_DEFECTO))
+    return _cache
+
+def ejecutar(archivo, parametros, seed=None):
+    """Ejecuta el algoritmo en este mismo proceso y devuelve [(tipo, clave, valor), ...]"""
+    resultados = obtener_cache().obtener(archivo, parametros, seed)
+    if resultados is None:
+        resultados = cargar(archivo).ejecutar(*parametros, seed=seed)
+        obtener_cache().guardar(archivo, parametros, seed, resultados)
+    return resultados
+
+def ejecutar_por_pasos(archivo, parametros, seed=None):
+    """
+    Generador con el estado de cada iteración del algoritmo; al agotarse,
+    su valor de retorno son las salidas [(tipo, clave, valor), ...].
+    Cerrarlo antes de tiempo detiene el algoritmo. Si el resultado ya está
+    en caché no produce ningún estado.
+    """
+    resultados = obtener_cache().obtener(archivo, parametros, seed)
+    if resultados is None:
+        resultados = yield from cargar(archivo).ejecutar_por_pasos(*parametros, seed=seed)
+        obtener_cache().guardar(archivo, parametros, seed, resultados)
+    return resultados
+
+def obtener_pool(workers=None):
+    """Grupo de procesos precalentados, creado la primera vez que se pide"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                        mp_context=contexto_procesos(), initializer=precargar)
+    return _pool
+
+def _ejecutar_binario(archivo, parametros, seed):
+    return protocolo.codificar(cargar(archivo).ejecutar(*parametros, seed=seed))
+
+def ejecutar_aislado(archivo, parametros, seed=None):
+    """Como ejecutar, pero en uno de los procesos precalentados; los resultados
+    vuelven como marcos binarios de protocolo (imágenes y arrays sin base64)"""
+    resultados = obtener_cache().obtener(archivo, parametros, seed)
+    if resultados is None:
+        datos = obtener_pool().submit(_ejecutar_binario, archivo, list(parametros), seed).result()
+        resultados = protocolo.decodificar(datos)
+        obtener_cache().guardar(archivo, parametros, seed, resultados)
+    return resultados
+
+def cerrar():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,78 @@
+"""
+Instrumentación opcional de los bucles de los algoritmos.
+
+Los algoritmos aceptan `instrumentacion=None`; si se les pasa una
+`Instrumentacion`, acumulan el tiempo de cada fase (construcción de rutas,
+evaluación, actualización de feromona...), cuentan evaluaciones y llaman a
+un callback con el estado de cada iteración. Sin ella usan `NULA`, cuyas
+operaciones no hacen nada, para no pagar el coste de medir.
+
+    inst = Instrumentacion()
+    AntColonySystem(distancias, seed=1, instrumentacion=inst).run()
+    inst.resumen()  # {'fases': {'construccion': {...}, ...}, 'contadores': {...}}
+"""
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+class _Fase:
+    __slots__ = ("inst", "nombre", "inicio")
+
+    def __init__(self, inst, nombre):
+        self.inst = inst
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.inst.tiempos[self.nombre] += time.perf_counter() - self.inicio
+        self.inst.llamadas[self.nombre] += 1
+
+class Instrumentacion:
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.tiempos = defaultdict(float)
+        self.llamadas = defaultdict(int)
+        self.contadores = defaultdict(int)
+
+    def fase(self, nombre):
+        """Context manager que suma el tiempo del bloque a la fase `nombre`"""
+        return _Fase(self, nombre)
+
+    def contar(self, nombre, n=1):
+        self.contadores[nombre] += n
+
+    def notificar(self, estado):
+        """Estado de una iteración: se pasa al callback si lo hay"""
+        if self.callback is not None:
+            self.callback(estado)
+
+    def reiniciar(self):
+        self.tiempos.clear()
+        self.llamadas.clear()
+        self.contadores.clear()
+
+    def resumen(self):
+        return {
+            "fases": {
+                nombre: {"tiempo": self.tiempos[nombre], "llamadas": self.llamadas[nombre]}
+                for nombre in self.tiempos
+            },
+            "contadores": dict(self.contadores),
+        }
+
+class _Nula:
+    """Instrumentación desactivada"""
+    _contexto = nullcontext()
+
+    def fase(self, nombre):
+        return self._contexto
+
+    def contar(self, nombre, n=1):
+        pass
+
+    def notificar(self, estado):
+        pass
+
+NULA = _Nula()
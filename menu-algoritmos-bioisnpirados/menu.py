@@ -1,11 +1,11 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
-import subprocess
+import os
+import time
 from typing import List, Tuple
-import io
-from PIL import Image
-import base64
+
+import ejecutor
+import planificador
 
 st.title("Menú de algoritmos bioinspirados en Streamlit")
 
@@ -46,10 +46,84 @@ algoritmos = {
     }
 }
 
+def mostrar_estado(estado):
+    """Resumen de una iteración para mostrar bajo el gráfico de convergencia"""
+    return " · ".join(
+        f"{clave}: {valor:.4g}" if isinstance(valor, float) else f"{clave}: {valor}"
+        for clave, valor in estado.items()
+        if isinstance(valor, (int, float, str))
+    )
+
+def mostrar_salida(salida):
+    """Muestra las salidas [(tipo, clave, valor), ...] de un algoritmo"""
+    st.text_area("Salida:", "\n".join(
+        f"{clave}: {valor.tolist() if tipo == 'array' else valor}"
+        for tipo, clave, valor in salida if tipo != "image"
+    ))
+    st.success("Algoritmo ejecutado correctamente")
+
+    # Procesar la salida
+    for tipo, clave, valor in salida:
+        if tipo == "success":
+            st.info(f"{clave}: {valor}")
+        elif tipo == "array":
+            st.info(f"{clave}: {', '.join(map(str, valor.tolist()))}")
+        elif tipo == "image":
+            # Bytes PNG directamente, sin pasar por base64
+            st.image(valor, caption=clave, use_container_width=True)
+        elif tipo == "error":
+            st.error(f"{clave}: {valor}")
+
+@st.cache_resource
+def obtener_planificador():
+    """Un único planificador para todas las sesiones: limita los trabajos simultáneos del servidor"""
+    return planificador.Planificador(max_concurrentes=os.cpu_count() or 2)
+
+def mostrar_trabajo(nombre, id_trabajo):
+    """Estado de un trabajo en segundo plano; se actualiza al pulsar "Actualizar" """
+    plan = obtener_planificador()
+    try:
+        trabajo = plan.estado(id_trabajo)
+    except KeyError:
+        # Caducó en el planificador sin llegar a mostrarse
+        del st.session_state[f"trabajo_{nombre}"]
+        st.warning("El trabajo ya no está disponible")
+        return
+    st.caption(f"Trabajo {trabajo.id}: {trabajo.estado.replace('_', ' ')}")
+    if trabajo.progreso is not None:
+        st.caption(mostrar_estado(trabajo.progreso))
+    if not trabajo.terminado:
+        col1, col2 = st.columns(2)
+        col1.button("Actualizar", key=f"actualizar_{nombre}")
+        if col2.button("Cancelar", key=f"cancelar_{nombre}"):
+            plan.cancelar(trabajo.id)
+            st.rerun()
+    else:
+        if trabajo.estado == planificador.TERMINADO:
+            mostrar_salida(trabajo.resultados)
+        elif trabajo.estado == planificador.CANCELADO:
+            st.warning("Trabajo cancelado")
+        else:
+            st.error(f"Error al ejecutar el algoritmo: {trabajo.error}")
+        # Ya mostrado: liberar los resultados del planificador compartido
+        plan.olvidar(trabajo.id)
+        del st.session_state[f"trabajo_{nombre}"]
+
 # Pestañas
 
 tabs = st.tabs(list(algoritmos.keys()))
 
+# Por defecto los algoritmos se ejecutan en este mismo proceso (ya importados);
+# aislado, en un grupo de procesos precalentados
+aislar = st.sidebar.checkbox("Ejecutar en procesos aislados", value=False)
+# Con semilla las ejecuciones son reproducibles y se reutilizan desde la caché
+semilla = st.sidebar.number_input("Semilla (0 = aleatoria)", min_value=0, step=1, value=0)
+seed = int(semilla) or None
+# En segundo plano la ejecución sigue aunque se recargue la página y se puede cancelar
+segundo_plano = st.sidebar.checkbox("En segundo plano", value=False)
+limite_tiempo = st.sidebar.number_input("Límite de tiempo (s, 0 = sin límite)", min_value=0, step=10, value=60)
+limite_cpu = st.sidebar.number_input("Límite de CPU (s, 0 = sin límite)", min_value=0, step=10, value=0)
+
 # Cada algoritmo con descripcion y parametros en su pestaña
 for i, (nombre, datos) in enumerate(algoritmos.items()):
     with tabs[i]:
@@ -63,32 +137,56 @@ for i, (nombre, datos) in enumerate(algoritmos.items()):
             elif param_data["tipo"] == "float":
                 valores[param_name] = st.number_input(param_name, min_value=0.0, step=0.1, key=f"{param_data['key']}_{nombre}")
         
+        clave_progreso = f"progreso_{nombre}"
+        clave_trabajo = f"trabajo_{nombre}"
         if st.button(f"Ejecutar {nombre}"):
             try:
-                resultado = subprocess.run(
-                ["python", datos["archivo"]] + [str(v) for v in valores.values()],
-                capture_output=True,
-                text=True
-                )   
-                st.text_area("Salida:", resultado.stdout)
-                comando = ["python", datos["archivo"]] + [str(v) for v in valores.values()]
-                resultado = subprocess.run(comando, capture_output=True, text=True)
-                
-                if resultado.returncode == 0:
-                    st.success("Algoritmo ejecutado correctamente")
-                    
-                    # Procesar la salida
-                    for linea in resultado.stdout.splitlines():
-                        if linea.startswith("success|"):
-                            _, clave, valor = linea.split("|")
-                            st.info(f"{clave}: {valor}")
-                        elif linea.startswith("image|"):
-                            _, titulo, img_data = linea.split("|")
-                            img_bytes = base64.b64decode(img_data)
-                            img = Image.open(io.BytesIO(img_bytes))
-                            st.image(img, caption=titulo, use_container_width=True)
+                parametros = list(valores.values())
+                if segundo_plano:
+                    st.session_state[clave_trabajo] = obtener_planificador().enviar(
+                        datos["archivo"], parametros, seed,
+                        limite_tiempo=limite_tiempo or None, limite_cpu=limite_cpu or None,
+                    )
+                    mostrar_trabajo(nombre, st.session_state[clave_trabajo])
+                    continue
+                st.session_state.pop(clave_trabajo, None)
+                if aislar:
+                    salida = ejecutor.ejecutar_aislado(datos["archivo"], parametros, seed)
                 else:
-                    st.error(f"Error en la ejecución: {resultado.stderr}")
-                    
+                    # Convergencia en vivo; pulsar "Detener" relanza el script y corta la ejecución
+                    progreso = st.session_state[clave_progreso] = []
+                    st.button("Detener", key=f"detener_{nombre}")
+                    grafico = st.empty()
+                    texto_estado = st.empty()
+                    pasos = ejecutor.ejecutar_por_pasos(datos["archivo"], parametros, seed)
+                    ultimo_dibujo = 0.0
+                    while True:
+                        try:
+                            estado = next(pasos)
+                        except StopIteration as fin:
+                            salida = fin.value
+                            break
+                        progreso.append(estado)
+                        if time.monotonic() - ultimo_dibujo > 0.2:
+                            grafico.line_chart([e["mejor"] for e in progreso])
+                            texto_estado.caption(mostrar_estado(estado))
+                            ultimo_dibujo = time.monotonic()
+                    if progreso:
+                        grafico.line_chart([e["mejor"] for e in progreso])
+                        texto_estado.caption(mostrar_estado(progreso[-1]))
+                    else:
+                        texto_estado.caption("Resultado recuperado de la caché")
+                    del st.session_state[clave_progreso]
+
+                mostrar_salida(salida)
+
             except Exception as e:
-                st.error(f"Error al ejecutar el algoritmo: {str(e)}")
\ No newline at end of file
+                st.error(f"Error al ejecutar el algoritmo: {str(e)}")
+        elif clave_trabajo in st.session_state:
+            mostrar_trabajo(nombre, st.session_state[clave_trabajo])
+        elif st.session_state.get(clave_progreso):
+            # La ejecución anterior se detuvo antes de terminar: mostrar hasta dónde llegó
+            progreso = st.session_state.pop(clave_progreso)
+            st.warning("Ejecución detenida antes de terminar")
+            st.line_chart([e["mejor"] for e in progreso])
+            st.caption(mostrar_estado(progreso[-1]))
@@ -0,0 +1,239 @@
+"""
+Planificador de trabajos en segundo plano para el menú.
+
+Cada ejecución es un trabajo que espera en una cola y se lanza en su propio
+proceso cuando hay hueco (como mucho `max_concurrentes` a la vez, para todas
+las sesiones de Streamlit). Un proceso por trabajo permite matarlo al
+cancelar o al superar su límite de tiempo real, cosa que un grupo de
+procesos no permite; el límite de CPU lo aplica el propio sistema con
+RLIMIT_CPU. Los procesos se crean desde un servidor de procesos (forkserver)
+con los algoritmos ya importados.
+
+La interfaz consulta el estado con `estado(id)`: el progreso llega por una
+tubería mientras el trabajo corre y los resultados al terminar, en marcos de
+`protocolo`.
+"""
+import itertools
+import signal
+import threading
+import time
+
+import ejecutor
+import protocolo
+
+try:
+    import resource
+except ImportError:  # Windows: sin límite de CPU, solo de tiempo real
+    resource = None
+
+EN_COLA = "en_cola"
+EJECUTANDO = "ejecutando"
+TERMINADO = "terminado"
+ERROR = "error"
+CANCELADO = "cancelado"
+TIEMPO_AGOTADO = "tiempo_agotado"
+FINALES = (TERMINADO, ERROR, CANCELADO, TIEMPO_AGOTADO)
+# Códigos de salida de un proceso matado por RLIMIT_CPU
+_SENALES_CPU = tuple(-s for s in (getattr(signal, "SIGXCPU", None), signal.SIGKILL) if s is not None)
+
+def _ejecutar_trabajo(conn, archivo, parametros, seed, limite_cpu, intervalo_progreso):
+    """Cuerpo del proceso hijo: ejecuta el algoritmo y envía progreso y resultados"""
+    if limite_cpu is not None and resource is not None:
+        # Al superar el límite blando el sistema envía SIGXCPU y el proceso termina
+        resource.setrlimit(resource.RLIMIT_CPU, (int(limite_cpu), int(limite_cpu) + 1))
+    try:
+        pasos = ejecutor.ejecutar_por_pasos(archivo, parametros, seed)
+        ultimo_envio = 0.0
+        while True:
+            try:
+                estado = next(pasos)
+            except StopIteration as fin:
+                conn.send(("fin", protocolo.codificar(fin.value)))
+                break
+            if time.monotonic() - ultimo_envio >= intervalo_progreso:
+                conn.send(("progreso", estado))
+                ultimo_envio = time.monotonic()
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+class Trabajo:
+    def __init__(self, id, archivo, parametros, seed, limite_tiempo, limite_cpu):
+        self.id = id
+        self.archivo = archivo
+        self.parametros = list(parametros)
+        self.seed = seed
+        self.limite_tiempo = limite_tiempo
+        self.limite_cpu = limite_cpu
+        self.estado = EN_COLA
+        self.progreso = None
+        self.resultados = None
+        self.error = None
+        self.creado = time.time()
+        # inicio y fin son de time.monotonic(): solo sirven para medir intervalos
+        self.inicio = None
+        self.fin = None
+        self._proceso = None
+        self._conn = None
+
+    @property
+    def terminado(self):
+        return self.estado in FINALES
+
+class Planificador:
+    def __init__(self, max_concurrentes=2, intervalo=0.1, intervalo_progreso=0.25,
+                 ttl_terminados=3600, max_terminados=100):
+        self.max_concurrentes = max_concurrentes
+        # Los trabajos terminados que nadie recoge con olvidar() caducan a los
+        # `ttl_terminados` segundos, y nunca se guardan más de `max_terminados`
+        self.ttl_terminados = ttl_terminados
+        self.max_terminados = max_terminados
+        self.intervalo = intervalo
+        self.intervalo_progreso = intervalo_progreso
+        self._ctx = ejecutor.contexto_procesos()
+        self._trabajos = {}
+        self._cola = []
+        # Procesos ya finalizados pendientes de join, que se hace fuera del lock
+        self._por_unir = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, archivo, parametros, seed=None, limite_tiempo=None, limite_cpu=None):
+        """Encola un trabajo y devuelve su id"""
+        if archivo not in ejecutor.MODULOS:
+            raise ValueError(f"Algoritmo desconocido: {archivo}")
+        with self._lock:
+            trabajo = Trabajo(next(self._ids), archivo, parametros, seed, limite_tiempo, limite_cpu)
+            self._trabajos[trabajo.id] = trabajo
+            self._cola.append(trabajo)
+        return trabajo.id
+
+    def estado(self, id):
+        with self._lock:
+            return self._trabajos[id]
+
+    def trabajos(self):
+        with self._lock:
+            return list(self._trabajos.values())
+
+    def cancelar(self, id):
+        """Cancela un trabajo en cola o en ejecución; no hace nada si ya terminó"""
+        with self._lock:
+            trabajo = self._trabajos[id]
+            if trabajo.estado == EN_COLA:
+                self._cola.remove(trabajo)
+                self._finalizar(trabajo, CANCELADO)
+            elif trabajo.estado == EJECUTANDO:
+                self._matar(trabajo, CANCELADO)
+        self._unir()
+
+    def olvidar(self, id):
+        """Elimina un trabajo terminado para liberar sus resultados"""
+        with self._lock:
+            if self._trabajos[id].terminado:
+                del self._trabajos[id]
+
+    def cerrar(self):
+        self._activo = False
+        self._hilo.join()
+        with self._lock:
+            for trabajo in list(self._trabajos.values()):
+                if trabajo.estado == EJECUTANDO:
+                    self._matar(trabajo, CANCELADO)
+        self._unir()
+
+    def _bucle(self):
+        while self._activo:
+            with self._lock:
+                self._revisar()
+            self._unir()
+            time.sleep(self.intervalo)
+
+    def _revisar(self):
+        ejecutando = [t for t in self._trabajos.values() if t.estado == EJECUTANDO]
+        for trabajo in ejecutando:
+            self._recibir(trabajo)
+            if trabajo.terminado:
+                continue
+            if trabajo.limite_tiempo is not None and time.monotonic() - trabajo.inicio > trabajo.limite_tiempo:
+                trabajo.error = f"Se superó el límite de {trabajo.limite_tiempo} s"
+                self._matar(trabajo, TIEMPO_AGOTADO)
+            elif not trabajo._proceso.is_alive():
+                self._recibir(trabajo)
+                if not trabajo.terminado:
+                    # Murió sin enviar resultados: por el límite de CPU (SIGXCPU al pasar el
+                    # límite blando, SIGKILL al pasar el duro) o por cualquier otro fallo
+                    codigo = trabajo._proceso.exitcode
+                    if trabajo.limite_cpu is not None and codigo in _SENALES_CPU:
+                        trabajo.error = f"Se superó el límite de CPU de {trabajo.limite_cpu} s"
+                        self._finalizar(trabajo, TIEMPO_AGOTADO)
+                    else:
+                        trabajo.error = f"El proceso terminó con código {codigo}"
+                        self._finalizar(trabajo, ERROR)
+
+        self._caducar()
+        libres = self.max_concurrentes - sum(t.estado == EJECUTANDO for t in self._trabajos.values())
+        while libres > 0 and self._cola:
+            self._lanzar(self._cola.pop(0))
+            libres -= 1
+
+    def _caducar(self):
+        terminados = sorted((t for t in self._trabajos.values() if t.terminado), key=lambda t: t.fin)
+        ahora = time.monotonic()
+        sobrantes = len(terminados) - self.max_terminados
+        for i, trabajo in enumerate(terminados):
+            if i < sobrantes or ahora - trabajo.fin > self.ttl_terminados:
+                del self._trabajos[trabajo.id]
+
+    def _lanzar(self, trabajo):
+        padre, hijo = self._ctx.Pipe(duplex=False)
+        trabajo._conn = padre
+        trabajo._proceso = self._ctx.Process(
+            target=_ejecutar_trabajo,
+            args=(hijo, trabajo.archivo, trabajo.parametros, trabajo.seed,
+                  trabajo.limite_cpu, self.intervalo_progreso),
+            daemon=True,
+        )
+        trabajo._proceso.start()
+        hijo.close()
+        trabajo.estado = EJECUTANDO
+        trabajo.inicio = time.monotonic()
+
+    def _recibir(self, trabajo):
+        try:
+            while not trabajo.terminado and trabajo._conn.poll():
+                tipo, datos = trabajo._conn.recv()
+                if tipo == "progreso":
+                    trabajo.progreso = datos
+                elif tipo == "fin":
+                    trabajo.resultados = protocolo.decodificar(datos)
+                    self._finalizar(trabajo, TERMINADO)
+                else:
+                    trabajo.error = datos
+                    self._finalizar(trabajo, ERROR)
+        except (EOFError, OSError):
+            pass
+
+    def _matar(self, trabajo, estado):
+        trabajo._proceso.kill()
+        self._finalizar(trabajo, estado)
+
+    def _finalizar(self, trabajo, estado):
+        trabajo.estado = estado
+        trabajo.fin = time.monotonic()
+        if trabajo._proceso is not None:
+            self._por_unir.append(trabajo._proceso)
+            trabajo._conn.close()
+            trabajo._proceso = None
+            trabajo._conn = None
+
+    def _unir(self):
+        """Espera a los procesos finalizados sin bloquear estado() ni enviar()"""
+        with self._lock:
+            procesos, self._por_unir = self._por_unir, []
+        for proceso in procesos:
+            proceso.join(timeout=1)
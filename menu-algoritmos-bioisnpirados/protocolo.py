@@ -0,0 +1,99 @@
+"""
+Canal de resultados entre los algoritmos y el menú.
+
+Cada resultado es una tupla (tipo, clave, valor):
+- "success": escalar o texto
+- "array": arreglo de NumPy (rutas, curvas de convergencia...)
+- "image": bytes de una imagen PNG
+- "error": mensaje de error
+
+En binario cada resultado viaja en un marco con longitud prefijada:
+
+    tipo (1 byte) | longitud de clave (2 bytes) | longitud de datos (4 bytes) | clave | datos
+
+Los escalares van como JSON, los arrays en formato .npy y las imágenes como
+bytes PNG sin base64. El formato de texto `tipo|clave|valor` se conserva para
+la salida por consola.
+"""
+import base64
+import io
+import json
+import struct
+import sys
+
+import numpy as np
+
+TIPOS = ("success", "array", "image", "error")
+_CABECERA = struct.Struct("!BHI")
+
+def _a_bytes(tipo, valor):
+    if tipo == "array":
+        buf = io.BytesIO()
+        np.save(buf, np.asarray(valor), allow_pickle=False)
+        return buf.getvalue()
+    if tipo == "image":
+        return bytes(valor)
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    return json.dumps(valor).encode()
+
+def _desde_bytes(tipo, datos):
+    if tipo == "array":
+        return np.load(io.BytesIO(datos), allow_pickle=False)
+    if tipo == "image":
+        return datos
+    return json.loads(datos)
+
+def codificar(resultados):
+    """Convierte una lista de (tipo, clave, valor) en marcos binarios"""
+    partes = []
+    for tipo, clave, valor in resultados:
+        clave_bytes = clave.encode()
+        datos = _a_bytes(tipo, valor)
+        partes.append(_CABECERA.pack(TIPOS.index(tipo), len(clave_bytes), len(datos)))
+        partes.append(clave_bytes)
+        partes.append(datos)
+    return b"".join(partes)
+
+def decodificar(datos):
+    """Operación inversa de codificar"""
+    vista = memoryview(datos)
+    resultados = []
+    pos = 0
+    while pos < len(vista):
+        codigo, n_clave, n_datos = _CABECERA.unpack_from(vista, pos)
+        pos += _CABECERA.size
+        clave = bytes(vista[pos:pos + n_clave]).decode()
+        pos += n_clave
+        tipo = TIPOS[codigo]
+        resultados.append((tipo, clave, _desde_bytes(tipo, bytes(vista[pos:pos + n_datos]))))
+        pos += n_datos
+    return resultados
+
+def consumir(pasos):
+    """
+    Agota un generador `ejecutar_por_pasos` ignorando el progreso y devuelve
+    los resultados finales (el valor de retorno del generador).
+    """
+    while True:
+        try:
+            next(pasos)
+        except StopIteration as fin:
+            return fin.value
+
+def a_texto(tipo, clave, valor):
+    """Línea `tipo|clave|valor` para la consola (las imágenes en base64)"""
+    if tipo == "image":
+        valor = base64.b64encode(valor).decode()
+    elif tipo == "array":
+        valor = ",".join(map(str, np.asarray(valor).ravel().tolist()))
+    return f"{tipo}|{clave}|{valor}"
+
+def imprimir(resultados, binario=False):
+    """Escribe los resultados en stdout, en texto o en marcos binarios"""
+    if binario:
+        sys.stdout.buffer.write(codificar(resultados))
+        sys.stdout.buffer.flush()
+    else:
+        for resultado in resultados:
+            print(a_texto(*resultado))
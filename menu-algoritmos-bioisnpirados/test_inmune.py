@@ -0,0 +1,14 @@
+import numpy as np
+
+import algoritmo_inmune
+
+def test_expansion_clonal_proporcional_a_la_afinidad():
+    rng = np.random.default_rng(1)
+    poblacion = np.packbits(rng.integers(0, 2, (2, 10), dtype=np.uint8), axis=1)
+    repertorio = algoritmo_inmune.Repertorio(poblacion, 10)
+    repertorio.expandir(np.array([0, 1]), np.array([1.0, 0.4]), rng, tasa_mutacion=0.0)
+    # Los clones sin mutación son copias de su padre, en el orden de los ganadores
+    clones = repertorio.poblacion[2:]
+    n_clones_0 = int((clones == poblacion[0]).all(axis=1).sum())
+    n_clones_1 = len(clones) - n_clones_0
+    assert n_clones_0 > n_clones_1 >= 1
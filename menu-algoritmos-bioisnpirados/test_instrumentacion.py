@@ -0,0 +1,25 @@
+import algoritmo_genetico
+import algoritmo_inmune
+import algoritmo_recocido
+from instrumentacion import Instrumentacion
+
+def test_genetic_algorithm_instrumentado():
+    inst = Instrumentacion()
+    algoritmo_genetico.genetic_algorithm(20, 0.01, max_generations=3, seed=1, instrumentacion=inst)
+    resumen = inst.resumen()
+    assert resumen["contadores"]["evaluaciones"] > 0
+    assert resumen["fases"]["evaluacion"]["llamadas"] == 3
+
+def test_sistema_inmune_artificial_instrumentado():
+    inst = Instrumentacion()
+    algoritmo_inmune.sistema_inmune_artificial(10, 0.5, seed=1, instrumentacion=inst)
+    resumen = inst.resumen()
+    assert resumen["contadores"]["calcular_afinidad"] > 0
+    assert "afinidad" in resumen["fases"]
+
+def test_run_simulated_annealing_instrumentado():
+    inst = Instrumentacion()
+    algoritmo_recocido.run_simulated_annealing(1.0, 50, seed=1, instrumentacion=inst)
+    resumen = inst.resumen()
+    assert resumen["contadores"]["evaluaciones"] == 51
+    assert resumen["fases"]["evaluacion"]["llamadas"] == 50
@@ -0,0 +1,19 @@
+import math
+
+import numpy as np
+
+import algoritmo_recocido
+from instrumentacion import Instrumentacion
+
+def test_esquema_logaritmico_empieza_en_temp_inicial():
+    temperaturas = []
+    inst = Instrumentacion(lambda estado: temperaturas.append(estado['temperatura']))
+    _, _, info = algoritmo_recocido.simulated_annealing(
+        lambda x: (x ** 2).sum(axis=1), [(-5, 5)] * 2, schedule='logarithmic',
+        temp_inicial=100.0, max_iteraciones=20, seed=1, instrumentacion=inst,
+    )
+    # Se notifica tras enfriar: la primera es la de k = 1 (la de k = 0 es temp_inicial)
+    assert temperaturas[0] == 100.0 * math.log(2) / math.log(3)
+    np.testing.assert_allclose(temperaturas, [100.0 * math.log(2) / math.log(k + 2) for k in range(1, 21)])
+    assert max(temperaturas) < 100.0
+    assert info['iteraciones'] == 20